@@ -7,6 +7,7 @@ from PySide6.QtWidgets import QApplication, QSystemTrayIcon, QMenu, QStyle, QDia
 from langdetect import detect, DetectorFactory
 
 from .memory_store import AppState, MemoryStore
+from .message_queue import HandoffQueue
 from .tts import TTSManager
 from .tts.tts_pipeline import TTSPipeline
 from .ui import MiniBar, OptionsDialog, TranslationWindow
@@ -30,8 +31,12 @@ from .controller_processing import ProcessingMixin
 
 class Controller(QObject, TrayMixin, WindowsMixin, OptionsMixin, TTSFlowMixin, ProcessingMixin):
     translationUpdateRequested = Signal(str, str, bool)
-    # Recoit les messages depuis le watcher (thread secondaire) via signal Qt.
+    # Recoit un message isolé via signal Qt (les rafales du watcher passent par message_queue).
     newMessageRequested = Signal(str)
+    # Fragments d'une réponse en cours d'écriture (mode streaming) : (texte, final)
+    partialMessageRequested = Signal(str, bool)
+    # Réponses manquées pendant que l'app était fermée (lot livré au démarrage)
+    catchUpRequested = Signal(list)
 
     def __init__(self, cfg: AppState, store: MemoryStore):
         super().__init__()
@@ -60,9 +65,27 @@ class Controller(QObject, TrayMixin, WindowsMixin, OptionsMixin, TTSFlowMixin, P
         self._allow_translation_window = False
         # Stopper l'auto-detection des langues des qu'un choix manuel est fait.
         self._auto_lang_enabled = True
+        # Réponse en cours de lecture en streaming
+        self._stream_active = False
+        self._stream_speak = False
+        self._stream_parts: list[str] = []
+        self._stream_display: list[str] = []
+        # Réponses manquées, lisibles via le menu du tray
+        self._missed_responses: list[str] = []
 
         self.translationUpdateRequested.connect(self._apply_translation_update)
         self.newMessageRequested.connect(self.update_last_response)
+        self.partialMessageRequested.connect(self.update_partial_response)
+        self.catchUpRequested.connect(self.update_missed_responses)
+
+        # Messages du watcher : déposés depuis son thread, vidés par lots sur le thread UI.
+        self.message_queue: HandoffQueue[str] = HandoffQueue(self.cfg.handoff_queue_size, self.cfg.handoff_policy)
+        self._drain_timer = QTimer(self)
+        self._drain_timer.setInterval(max(10, int(self.cfg.handoff_drain_ms)))
+        self._drain_timer.timeout.connect(self._drain_message_queue)
+        # Compteurs (abandonnés, fusionnés) déjà signalés
+        self._handoff_seen = (0, 0)
+        self._drain_timer.start()
 
         self.tts.events.started.connect(self._refresh_ui)
         self.tts.events.finished.connect(self._refresh_ui)
@@ -118,7 +141,10 @@ class Controller(QObject, TrayMixin, WindowsMixin, OptionsMixin, TTSFlowMixin, P
         self.act_pause_app.setText("Reprendre le service" if self.cfg.app_paused else "Mettre le service en pause")
 
         voice = self.cfg.tts_voice_id or "auto"
-        engine = "WinRT" if voice.startswith("winrt:") else ("SAPI" if voice.startswith("sapi:") else "Auto")
+        if voice.startswith("offline:"):
+            engine = "Hors-ligne"
+        else:
+            engine = "WinRT" if voice.startswith("winrt:") else ("SAPI" if voice.startswith("sapi:") else "Auto")
 
         if self.cfg.app_paused:
             status = f"⏸️ Pause app • {engine}"
@@ -1,13 +1,20 @@
+import logging
+
 from langdetect import detect
 
+from .dedup_cache import stable_digest
 from .ui.options_data import get_target_lang_label_text
 
+logger = logging.getLogger(__name__)
+
 
 class ProcessingMixin:
     def update_last_response(self, text: str):
         if self.cfg.app_paused:
             return
-        h = str(hash(text))
+        # L'anti-doublon par message est fait par le watcher : ici, seule la répétition
+        # immédiate (même réponse relivrée) est écartée.
+        h = stable_digest(text)
         if h == self.last_response_hash:
             return
         self.last_response_hash = h
@@ -43,6 +50,144 @@ class ProcessingMixin:
             self.read_last_response()
         else:
             self._refresh_translation_only()
+    def _drain_message_queue(self):
+        queue = self.message_queue
+        batch = queue.drain(queue.maxsize)
+        seen_dropped, seen_coalesced = self._handoff_seen
+        if queue.dropped != seen_dropped:
+            logger.warning("File des réponses pleine : %d réponse(s) abandonnée(s) au total", queue.dropped)
+            self._update_tray_icon()
+        if queue.coalesced != seen_coalesced:
+            logger.info("%d réponse(s) remplacée(s) par une plus récente au total", queue.coalesced)
+        self._handoff_seen = (queue.dropped, queue.coalesced)
+        if batch:
+            self.update_queued_responses(batch)
+    def update_queued_responses(self, batch: list[str]):
+        """Un lot de réponses du watcher : la dernière seule (latest) ou toutes, dans l'ordre (fifo)."""
+        if self.cfg.app_paused or not batch:
+            return
+        if self.message_queue.policy != self.message_queue.FIFO:
+            self.update_last_response(batch[-1])
+            return
+        first, rest = batch[0], batch[1:]
+        if self._skip_first_auto_read or not (self.tts.is_speaking() or self.tts.is_paused()):
+            self.update_last_response(first)
+        else:
+            rest = batch
+        for text in rest:
+            self._append_response(text)
+        if rest:
+            self._refresh_ui()
+    def _append_response(self, text: str, requested: bool = False):
+        """
+        FIFO : traite la réponse et l'ajoute à la lecture en cours au lieu de l'interrompre.
+        requested=True (demande explicite) : ni anti-doublon ni option de lecture auto.
+        """
+        h = stable_digest(text)
+        if not requested and h == self.last_response_hash:
+            return
+        self.last_response_hash = h
+        self.last_response_text = text
+        self._allow_translation_window = True
+        self._refresh_translation_only()
+        if (
+            (requested or self.cfg.auto_read_new_responses)
+            and self.cfg.tts_enabled
+            and not self.cfg.tts_mute
+            and self._is_lang_available(self.cfg.target_lang)
+        ):
+            self.tts.enqueue(self.last_spoken_text, self.cfg)
+    def update_missed_responses(self, texts: list):
+        """Lot de reprise du watcher : proposé via notification + menu, pas lu d'office."""
+        texts = [t for t in texts if isinstance(t, str) and t.strip()]
+        if not texts:
+            return
+        self._missed_responses = texts
+        # Le lot remplace l'amorçage du démarrage (non envoyé par le watcher) : la dernière
+        # réponse manquée devient la réponse courante (Play) et la suivante sera lue.
+        self._skip_first_auto_read = False
+        self.last_response_text = texts[-1]
+        self.last_response_hash = stable_digest(texts[-1])
+        self.act_read_missed.setText(f"Lire les réponses manquées ({len(texts)})")
+        self.act_read_missed.setVisible(True)
+        self.notify(
+            "Réponses manquées",
+            f"{len(texts)} réponse(s) écrite(s) pendant la fermeture. Menu : Lire les réponses manquées.",
+        )
+    def _read_missed_responses(self):
+        texts, self._missed_responses = self._missed_responses, []
+        self.act_read_missed.setVisible(False)
+        if not texts or self.cfg.app_paused:
+            return
+        self.tts.stop()
+        self.last_response_text = texts[0]
+        self.last_response_hash = stable_digest(texts[0])
+        self.read_last_response()
+        for text in texts[1:]:
+            self._append_response(text, requested=True)
+        self._refresh_ui()
+    def update_partial_response(self, fragment: str, final: bool):
+        """Phrase(s) d'une réponse encore en cours d'écriture : lues sans attendre la fin."""
+        if self.cfg.app_paused:
+            return
+        fragment = (fragment or "").strip()
+        if not self._stream_active:
+            if not fragment:
+                return
+            self._stream_active = True
+            self._stream_parts = []
+            self._stream_display = []
+            self._stream_speak = (
+                not self._skip_first_auto_read
+                and self.cfg.auto_read_new_responses
+                and self.cfg.tts_enabled
+                and not self.cfg.tts_mute
+            )
+            self._skip_first_auto_read = False
+            self._allow_translation_window = True
+            # Langue détectée sur le premier fragment, conservée pour toute la réponse.
+            try:
+                self.last_detected_lang = detect(fragment[:1000])
+            except Exception:
+                self.last_detected_lang = "?"
+            if not self.cfg.translate_enabled and getattr(self, "_auto_lang_enabled", True):
+                detected = (self.last_detected_lang or "").lower()
+                if detected and detected != "?":
+                    self.cfg.target_lang = detected
+                    voice_id = self.tts.pick_voice_for_lang(detected)
+                    if voice_id:
+                        self.cfg.tts_voice_id = voice_id
+            if self._stream_speak:
+                self.tts.stop()
+
+        if fragment:
+            self._stream_parts.append(fragment)
+            result = self.tts_pipeline.process(
+                text=fragment,
+                target_lang=self.cfg.target_lang.lower(),
+                translate_enabled=self.cfg.translate_enabled,
+                detected_lang=self.last_detected_lang,
+                voice_id=self.cfg.tts_voice_id,
+            )
+            self.cfg.target_lang = result.effective_lang
+            if result.voice_id:
+                self.cfg.tts_voice_id = result.voice_id
+            self._stream_display.append(result.display_text)
+            self.last_translation_text = " ".join(self._stream_display)
+            self.last_translation_lang = self.cfg.target_lang
+            self.last_translation_label = get_target_lang_label_text(self.cfg.ui_lang, self.cfg.target_lang)
+            show_text = self.cfg.show_translation_window and bool(self.last_translation_text.strip())
+            self._queue_translation_update(self.last_translation_text, self.last_translation_label, show_text)
+            if self._stream_speak and self._is_lang_available(self.cfg.target_lang):
+                self.tts.enqueue(result.spoken_text, self.cfg)
+
+        if final:
+            self._stream_active = False
+            text = " ".join(self._stream_parts)
+            self.last_response_hash = stable_digest(text)
+            self.last_response_text = text
+            self.last_spoken_text = text
+        self._refresh_ui()
     def read_last_response(self):
         if self.cfg.app_paused:
             self.notify("App en pause", "Reprends l'app pour lire automatiquement.")
@@ -76,6 +76,11 @@ class TrayMixin:
         self.act_mute.setCheckable(True)
         self.act_mute.triggered.connect(self._on_mute_toggle)
 
+        self.act_read_missed = QAction("Lire les réponses manquées")
+        self.act_read_missed.triggered.connect(self._read_missed_responses)
+        self.act_read_missed.setVisible(False)
+        menu.addAction(self.act_read_missed)
+
         self.act_options = QAction("⚙️ Options…")
         self.act_options.triggered.connect(self._open_options)
         menu.addAction(self.act_options)
@@ -147,6 +152,10 @@ class TrayMixin:
             icon = self._idle_tray_icon(self.cfg.tts_mute, QColor(0, 200, 0))
             tip = "SpeachCodexGPT - Actif"
 
+        dropped = self.message_queue.dropped if getattr(self, "message_queue", None) is not None else 0
+        if dropped:
+            tip += f" ({dropped} réponse(s) abandonnée(s), file pleine)"
+
         self.tray.setIcon(icon)
         self.tray.setToolTip(tip)
 
@@ -8,7 +8,7 @@ logger = logging.getLogger(__name__)
 class TTSFlowMixin:
     def _quit_app(self):
         try:
-            self.tts.stop()
+            self.tts.close()
         except Exception:
             logger.exception("TTS stop failed during quit")
         self.tray.hide()
@@ -77,6 +77,14 @@ class TTSFlowMixin:
             self._options_dialog.sync_show_text_from_config()
         self._refresh_ui()
     def _apply_cfg_effects(self):
+        queue = getattr(self, "message_queue", None)
+        if queue is not None:
+            # Politique / taille / cadence de la file modifiables sans redémarrer
+            queue.configure(self.cfg.handoff_queue_size, self.cfg.handoff_policy)
+            interval = max(10, int(self.cfg.handoff_drain_ms))
+            # setInterval() relance le timer : seulement si la cadence a changé
+            if self._drain_timer.interval() != interval:
+                self._drain_timer.setInterval(interval)
         if self.cfg.tts_mute:
             try:
                 self.tts.stop()
@@ -0,0 +1,95 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+
+def stable_digest(text: str, message_id: str = "") -> str:
+    """Empreinte stable entre processus (contrairement à hash()), texte normalisé + id."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update((message_id or "").encode("utf-8"))
+    h.update(b"\0")
+    h.update(" ".join((text or "").split()).encode("utf-8"))
+    return h.hexdigest()
+
+
+class DedupCache:
+    """
+    Anti-doublon borné : LRU d'empreintes avec TTL, sauvegardé entre deux lancements.
+
+    Test d'appartenance en O(1), mémoire fixe (max_entries).
+    """
+
+    def __init__(self, max_entries: int = 512, ttl: float = 7 * 24 * 3600.0, path: Optional[Path] = None):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = float(ttl)
+        self.path = path
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return self.seen(key)
+
+    def seen(self, key: str) -> bool:
+        added = self._entries.get(key)
+        if added is None:
+            return False
+        if self.ttl > 0 and (time.time() - added) > self.ttl:
+            del self._entries[key]
+            self._dirty = True
+            return False
+        return True
+
+    def add(self, key: str):
+        self._entries[key] = time.time()
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self._dirty = True
+
+    def check_and_add(self, key: str) -> bool:
+        """Retourne True si la clé est nouvelle (et l'enregistre)."""
+        if self.seen(key):
+            self._entries.move_to_end(key)
+            return False
+        self.add(key)
+        return True
+
+    def load(self) -> bool:
+        if self.path is None or not self.path.exists():
+            return False
+        try:
+            raw = json.loads(self.path.read_text(encoding="utf-8"))
+        except Exception:
+            return False
+        if not isinstance(raw, list):
+            return False
+        now = time.time()
+        self._entries.clear()
+        for item in raw[-self.max_entries:]:
+            try:
+                key, added = str(item[0]), float(item[1])
+            except (TypeError, ValueError, IndexError):
+                continue
+            if self.ttl > 0 and (now - added) > self.ttl:
+                continue
+            self._entries[key] = added
+        self._dirty = False
+        return True
+
+    def save(self):
+        if self.path is None or not self._dirty:
+            return
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(json.dumps(list(self._entries.items())), encoding="utf-8")
+            tmp_path.replace(self.path)
+            self._dirty = False
+        except Exception:
+            pass
@@ -9,6 +9,11 @@ def _storage_path() -> Path:
     return Path(root) / "SpeachCodexGPT" / "state.json"
 
 
+def storage_dir() -> Path:
+    """Dossier de state.json (caches et index persistants à côté)."""
+    return _storage_path().parent
+
+
 @dataclass
 class AppState:
     # Positions / tailles (px)
@@ -33,10 +38,25 @@ class AppState:
     tts_enabled: bool = True
     tts_mute: bool = False
     tts_voice_id: str = "winrt:Microsoft Paul"
+    # Moteur de synthèse : "auto" (WinRT si dispo), "winrt" ou "offline" (référence, tests)
+    tts_engine: str = "auto"
+    # Phrases synthétisées à l'avance pendant la lecture de la phrase courante (0 = aucune)
+    tts_lookahead: int = 2
+    # Cache de l'audio synthétisé (texte, voix, vitesse) : mémoire puis disque, en Mo (0 = off)
+    tts_cache_memory_mb: int = 32
+    tts_cache_disk_mb: int = 256
     tts_rate: float = 1.0
     tts_volume: int = 80
     translate_enabled: bool = True
     target_lang: str = "fr"
+    # Lecture des réponses pendant leur écriture par Codex (deltas), opt-in
+    stream_partial_messages: bool = False
+    # File watcher -> UI : "latest" (seule la dernière réponse compte) ou "fifo" (toutes lues)
+    handoff_policy: str = "latest"
+    handoff_queue_size: int = 32
+    handoff_drain_ms: int = 150
+    # Au démarrage, proposer les réponses écrites pendant que l'app était fermée
+    catch_up_on_start: bool = True
 
     # Voix par langue cible
     voice_per_lang: dict = field(default_factory=lambda: {"fr": "winrt:Microsoft Paul"})
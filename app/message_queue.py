@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import threading
+from collections import deque
+from typing import Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class HandoffQueue(Generic[T]):
+    """
+    File bornée thread-safe entre le thread du watcher (put) et le thread UI (drain).
+
+    - "latest" : seul le dernier message est conservé (les précédents sont fusionnés).
+    - "fifo"   : ordre conservé ; si la file est pleine, le plus ancien est abandonné
+        et compté dans `dropped`.
+    """
+
+    LATEST = "latest"
+    FIFO = "fifo"
+    POLICIES = (LATEST, FIFO)
+
+    def __init__(self, maxsize: int = 32, policy: str = LATEST):
+        self._lock = threading.Lock()
+        self._items: deque[T] = deque()
+        self.maxsize = max(1, int(maxsize))
+        self.policy = policy if policy in self.POLICIES else self.LATEST
+        self.dropped = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def configure(self, maxsize: Optional[int] = None, policy: Optional[str] = None):
+        with self._lock:
+            if maxsize is not None:
+                self.maxsize = max(1, int(maxsize))
+            if policy is not None and policy in self.POLICIES:
+                self.policy = policy
+            self._trim()
+
+    def _trim(self):
+        limit = 1 if self.policy == self.LATEST else self.maxsize
+        while len(self._items) > limit:
+            self._items.popleft()
+            if self.policy == self.LATEST:
+                self.coalesced += 1
+            else:
+                self.dropped += 1
+
+    def put(self, item: T):
+        with self._lock:
+            self._items.append(item)
+            self._trim()
+
+    def drain(self, max_items: Optional[int] = None) -> list[T]:
+        """Retire jusqu'à `max_items` éléments (tous par défaut), du plus ancien au plus récent."""
+        with self._lock:
+            if not self._items:
+                return []
+            if max_items is None or max_items >= len(self._items):
+                batch = list(self._items)
+                self._items.clear()
+                return batch
+            return [self._items.popleft() for _ in range(max(1, max_items))]
@@ -0,0 +1,189 @@
+"""
+Rejeu hors-ligne (sans UI) de l'historique des rollouts Codex.
+
+Chaque réponse assistant des rollouts choisis passe par le même pipeline que l'application
+(extraction -> détection de langue -> traduction -> normalisation TTS) dans un pool de
+processus ; le résultat est écrit en JSONL. Sert à préchauffer les caches et à mesurer le
+débit du pipeline (messages/s).
+
+    python -m app.replay --since 2026-01-01 --until 2026-01-31 -o replay.jsonl
+    python -m app.replay chemin/vers/rollout-xxx.jsonl --workers 8 --translate
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from .tts.tts_pipeline import TTSPipeline
+from .watchers.codex_sessions_watcher import CodexSessionsWatcher, CodexSessionsWatcherConfig
+
+# (session, id, horodatage, texte)
+_Job = tuple[str, str, str, str]
+
+# État par processus du pool (initialisé une fois par worker)
+_pipeline: Optional[TTSPipeline] = None
+_detect = None
+_options: dict = {}
+
+
+def _init_worker(options: dict):
+    global _pipeline, _detect, _options
+    _options = options
+    translator = None
+    if options.get("translate"):
+        # googletrans optionnel (Python 3.13+ cassé)
+        try:
+            from googletrans import Translator
+
+            translator = Translator()
+        except Exception:
+            translator = None
+    try:
+        from langdetect import detect, DetectorFactory
+
+        DetectorFactory.seed = 0
+        _detect = detect
+    except Exception:
+        _detect = None
+    _pipeline = TTSPipeline(None, translator)
+
+
+def _process(job: _Job) -> dict:
+    session, message_id, timestamp, text = job
+    lang = "?"
+    if _detect is not None:
+        try:
+            lang = _detect(text[:1000])
+        except Exception:
+            lang = "?"
+    result = _pipeline.process(
+        text=text,
+        target_lang=_options.get("target_lang", "fr"),
+        translate_enabled=bool(_options.get("translate")),
+        detected_lang=lang,
+    )
+    return {
+        "session": session,
+        "id": message_id,
+        "timestamp": timestamp,
+        "lang": result.effective_lang,
+        "detected_lang": lang,
+        "display_text": result.display_text,
+        "spoken_text": result.spoken_text,
+    }
+
+
+def rollouts_between(root: Path, pattern: str, since: date, until: date) -> list[Path]:
+    """Rollouts des dossiers racine/AAAA/MM/JJ compris entre `since` et `until` inclus."""
+    found: list[Path] = []
+    day = since
+    while day <= until:
+        directory = root / f"{day.year:04d}" / f"{day.month:02d}" / f"{day.day:02d}"
+        if directory.is_dir():
+            found.extend(sorted(directory.glob(pattern)))
+        day += timedelta(days=1)
+    return found
+
+
+def iter_jobs(watcher: CodexSessionsWatcher, rollouts: Iterable[Path]) -> Iterator[_Job]:
+    for fpath in rollouts:
+        try:
+            for record in watcher.iter_records(fpath):
+                yield str(fpath), record.id, record.timestamp, record.text
+        except OSError as e:
+            print(f"[replay] Lecture impossible ({fpath}): {e}", file=sys.stderr)
+
+
+def replay(
+    rollouts: list[Path],
+    out,
+    workers: int = 0,
+    target_lang: str = "fr",
+    translate: bool = False,
+    chunksize: int = 16,
+    watcher: Optional[CodexSessionsWatcher] = None,
+) -> tuple[int, float]:
+    """Traite les rollouts et écrit une ligne JSON par réponse. Retourne (messages, secondes)."""
+    watcher = watcher or CodexSessionsWatcher(CodexSessionsWatcherConfig(), log=lambda _msg: None)
+    options = {"target_lang": target_lang.lower(), "translate": translate}
+    jobs = iter_jobs(watcher, rollouts)
+    workers = workers or os.cpu_count() or 1
+
+    count = 0
+    started = time.perf_counter()
+    if workers <= 1:
+        _init_worker(options)
+        results = map(_process, jobs)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(workers, initializer=_init_worker, initargs=(options,))
+        # imap : résultats dans l'ordre des rollouts, sans tout garder en mémoire
+        results = pool.imap(_process, jobs, chunksize=chunksize)
+    try:
+        for row in results:
+            out.write(json.dumps(row, ensure_ascii=False) + "\n")
+            count += 1
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return count, time.perf_counter() - started
+
+
+def _parse_date(value: str) -> date:
+    return date.fromisoformat(value)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.replay", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("rollouts", nargs="*", type=Path, help="Rollouts à rejouer (sinon --since/--until)")
+    parser.add_argument("--since", type=_parse_date, help="Premier jour (AAAA-MM-JJ)")
+    parser.add_argument("--until", type=_parse_date, help="Dernier jour inclus (défaut: aujourd'hui)")
+    parser.add_argument("-o", "--output", default="-", help="Fichier JSONL de sortie (défaut: stdout)")
+    parser.add_argument("-w", "--workers", type=int, default=0, help="Processus du pool (défaut: nb de CPU)")
+    parser.add_argument("--chunksize", type=int, default=16, help="Messages envoyés par lot à chaque worker")
+    parser.add_argument("--target-lang", default="fr", help="Langue cible (défaut: fr)")
+    parser.add_argument("--translate", action="store_true", help="Traduire (googletrans, réseau requis)")
+    args = parser.parse_args(argv)
+
+    watcher = CodexSessionsWatcher(CodexSessionsWatcherConfig(), log=lambda _msg: None)
+    rollouts: list[Path] = list(args.rollouts)
+    if args.since or args.until:
+        since = args.since or args.until
+        until = args.until or date.today()
+        rollouts += rollouts_between(watcher._codex_sessions_root(), watcher.cfg.pattern, since, until)
+    if not rollouts:
+        parser.error("aucun rollout : passer des chemins ou --since/--until")
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        count, elapsed = replay(
+            rollouts,
+            out,
+            workers=args.workers,
+            target_lang=args.target_lang,
+            translate=args.translate,
+            chunksize=args.chunksize,
+            watcher=watcher,
+        )
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    rate = count / elapsed if elapsed > 0 else 0.0
+    print(
+        f"[replay] {len(rollouts)} rollouts, {count} messages en {elapsed:.2f}s ({rate:.1f} messages/s)",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
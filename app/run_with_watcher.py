@@ -34,16 +34,29 @@ def main():
 
     def on_new(text, html):
         # HTML not needed for now (kept for compatibility with existing watcher signature)
-        # Passe par un signal Qt pour basculer sur le thread UI.
-        controller.newMessageRequested.emit(text)
+        # File bornée vidée par lots sur le thread UI (pas un signal Qt par message).
+        controller.message_queue.put(text)
+
+    def on_partial(fragment, final):
+        controller.partialMessageRequested.emit(fragment, final)
+
+    def on_catch_up(records):
+        controller.catchUpRequested.emit([r.text for r in records])
 
     # Read Codex transcripts from disk (~/.codex/sessions/.../rollout-*.jsonl)
     sessions_watcher = CodexSessionsWatcher(
-        CodexSessionsWatcherConfig(),
+        CodexSessionsWatcherConfig(
+            stream_partial_messages=bool(cfg.stream_partial_messages),
+            catch_up_on_start=bool(cfg.catch_up_on_start),
+        ),
         on_new_message=on_new,
         log=print,
+        on_partial_message=on_partial,
+        on_catch_up=on_catch_up,
     )
-    sessions_watcher.start()
+    if sessions_watcher.start():
+        # Arrêt propre : offsets / anti-doublon / index sauvegardés à la fermeture
+        app.aboutToQuit.connect(sessions_watcher.stop)
     app._sessions_watcher = sessions_watcher
 
     return app.exec()
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from ..dedup_cache import stable_digest
+
+
+class AudioCache:
+    """
+    Cache à deux niveaux de l'audio synthétisé (WAV), clé = (texte normalisé, voix, vitesse).
+
+    - Mémoire : LRU bornée en octets.
+    - Disque : fichiers adressés par leur clé (dossier/ab/<clé>.wav), bornés en taille ;
+        l'éviction suit le mtime, rafraîchi à chaque lecture (LRU approchée).
+
+    get()/put() couvrent les deux niveaux. Les niveaux sont aussi accessibles séparément
+    (get_memory/put_memory sans E/S, get_disk/put_disk bloquants) pour qu'une boucle
+    asyncio délègue le disque à un executor ; chaque niveau a son propre verrou.
+    """
+
+    def __init__(self, memory_bytes: int = 32 * 1024 * 1024, disk_dir: Optional[Path] = None,
+                 disk_bytes: int = 256 * 1024 * 1024):
+        self.memory_bytes = max(0, int(memory_bytes))
+        self.disk_dir = disk_dir if disk_bytes > 0 else None
+        self.disk_bytes = max(0, int(disk_bytes))
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._memory_size = 0
+        # clé -> taille, du moins récemment utilisé au plus récent (chargé à la demande)
+        self._disk: Optional[OrderedDict[str, int]] = None
+        self._disk_size = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(text: str, voice_id: str, rate: float) -> str:
+        return stable_digest(text, f"{voice_id}|{float(rate):.2f}")
+
+    # -------- mémoire --------
+
+    def _remember(self, key: str, audio: bytes):
+        if len(audio) > self.memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_size -= len(previous)
+        self._memory[key] = audio
+        self._memory_size += len(audio)
+        while self._memory_size > self.memory_bytes and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+
+    # -------- disque --------
+
+    def _path(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / f"{key}.wav"
+
+    def _load_disk_index(self) -> OrderedDict:
+        if self._disk is not None:
+            return self._disk
+        entries: list[tuple[float, str, int]] = []
+        try:
+            for sub in os.scandir(self.disk_dir):
+                if not sub.is_dir():
+                    continue
+                for entry in os.scandir(sub.path):
+                    if entry.name.endswith(".wav"):
+                        st = entry.stat()
+                        entries.append((st.st_mtime, entry.name[:-4], st.st_size))
+        except OSError:
+            pass
+        entries.sort()
+        self._disk = OrderedDict((key, size) for _, key, size in entries)
+        self._disk_size = sum(size for _, _, size in entries)
+        return self._disk
+
+    def _evict_disk(self, disk: OrderedDict):
+        while self._disk_size > self.disk_bytes and disk:
+            key, size = disk.popitem(last=False)
+            self._disk_size -= size
+            try:
+                self._path(key).unlink()
+            except OSError:
+                pass
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        disk = self._load_disk_index()
+        if key not in disk:
+            return None
+        path = self._path(key)
+        try:
+            audio = path.read_bytes()
+            os.utime(path, None)
+        except OSError:
+            self._disk_size -= disk.pop(key)
+            return None
+        disk.move_to_end(key)
+        return audio
+
+    def _write_disk(self, key: str, audio: bytes):
+        if len(audio) > self.disk_bytes:
+            return
+        disk = self._load_disk_index()
+        path = self._path(key)
+        tmp_path = path.with_suffix(".tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_bytes(audio)
+            tmp_path.replace(path)
+        except OSError:
+            return
+        self._disk_size += len(audio) - disk.pop(key, 0)
+        disk[key] = len(audio)
+        self._evict_disk(disk)
+
+    # -------- API --------
+
+    def get_memory(self, key: str) -> Optional[bytes]:
+        """Niveau mémoire seul (sans E/S) ; un défaut n'est compté qu'après get_disk()."""
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+            return audio
+
+    def put_memory(self, key: str, audio: bytes):
+        if not audio:
+            return
+        with self._lock:
+            self._remember(key, audio)
+
+    def get_disk(self, key: str) -> Optional[bytes]:
+        """Niveau disque (bloquant) ; un hit est remonté en mémoire."""
+        audio = None
+        if self.disk_dir is not None:
+            with self._disk_lock:
+                audio = self._read_disk(key)
+        with self._lock:
+            if audio is None:
+                self.misses += 1
+                return None
+            self._remember(key, audio)
+            self.hits += 1
+            return audio
+
+    def put_disk(self, key: str, audio: bytes):
+        if not audio or self.disk_dir is None:
+            return
+        with self._disk_lock:
+            self._write_disk(key, audio)
+
+    def get(self, key: str) -> Optional[bytes]:
+        audio = self.get_memory(key)
+        return audio if audio is not None else self.get_disk(key)
+
+    def put(self, key: str, audio: bytes):
+        self.put_memory(key, audio)
+        self.put_disk(key, audio)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_size = 0
+        if self.disk_dir is not None:
+            with self._disk_lock:
+                disk = self._load_disk_index()
+                self._disk_size = 0
+                for key in list(disk):
+                    try:
+                        self._path(key).unlink()
+                    except OSError:
+                        pass
+                disk.clear()
+
+    def stats(self) -> dict:
+        with self._lock, self._disk_lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_size,
+                "disk_entries": len(self._disk) if self._disk is not None else None,
+                "disk_bytes": self._disk_size if self._disk is not None else None,
+            }
@@ -0,0 +1,411 @@
+from __future__ import annotations
+
+import array
+import asyncio
+import io
+import math
+import sys
+import threading
+import wave
+import zlib
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+
+def clamp(n: int, lo: int, hi: int) -> int:
+    return max(lo, min(hi, n))
+
+
+# WinRT TTS (voices Windows OneCore: Julie/Paul/Hortense)
+try:
+    from winsdk.windows.media.speechsynthesis import SpeechSynthesizer
+    import winsdk.windows.media.core as media_core
+    import winsdk.windows.media.playback as media_playback
+    import winsdk.windows.storage.streams as winrt_streams
+except Exception:
+    SpeechSynthesizer = None
+    media_core = None
+    media_playback = None
+    winrt_streams = None
+
+
+class TTSEngine(ABC):
+    """
+    Moteur de synthèse utilisé par TTSManager (file, pause/reprise, config à chaud).
+
+    - list_voices() : dicts {"engine", "id", "name", "languages"} ; les ids commencent
+        par `prefix` (ex: "winrt:").
+    - synthesize() : rend une phrase en WAV (bytes), sans la jouer.
+    - play() : joue un WAV et rend la main à la fin de la lecture (événement du moteur),
+        sur cancel(), ou si should_stop() est vrai au démarrage.
+    - cancel() : coupe la lecture en cours (appelable depuis n'importe quel thread).
+    """
+
+    name = ""
+    prefix = ""
+
+    def __init__(self):
+        self._wait_lock = threading.Lock()
+        # Lecture en cours : (boucle, future résolue à la fin de lecture)
+        self._waiter: Optional[tuple] = None
+
+    def available(self) -> bool:
+        return False
+
+    def list_voices(self) -> List[Dict[str, Any]]:
+        return []
+
+    def owns(self, voice_id: str) -> bool:
+        return (voice_id or "").startswith(self.prefix)
+
+    def voice_name(self, voice_id: str) -> str:
+        return voice_id[len(self.prefix):] if self.owns(voice_id) else ""
+
+    @abstractmethod
+    async def synthesize(self, text: str, voice_id: str, cfg) -> bytes:
+        ...
+
+    @abstractmethod
+    async def play(self, audio: bytes, text: str, cfg, should_stop: Callable[[], bool]) -> None:
+        ...
+
+    def cancel(self) -> None:
+        with self._wait_lock:
+            waiter, self._waiter = self._waiter, None
+        if waiter is not None:
+            self._resolve(*waiter, None)
+
+    def _arm_completion(self) -> asyncio.Future:
+        """Future de fin de la lecture qui commence (résolue par le moteur ou cancel())."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._wait_lock:
+            self._waiter = (loop, future)
+        return future
+
+    @staticmethod
+    def _resolve(loop: asyncio.AbstractEventLoop, future: asyncio.Future, result) -> None:
+        """Résout `future` depuis n'importe quel thread (callbacks du moteur)."""
+        def resolve():
+            if not future.done():
+                future.set_result(result)
+        try:
+            loop.call_soon_threadsafe(resolve)
+        except RuntimeError:
+            # boucle déjà fermée
+            pass
+
+    async def _wait_completion(self, future: asyncio.Future, timeout: float):
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            with self._wait_lock:
+                if self._waiter is not None and self._waiter[1] is future:
+                    self._waiter = None
+
+
+def wav_duration(audio: bytes) -> float:
+    try:
+        with wave.open(io.BytesIO(audio), "rb") as w:
+            return w.getnframes() / float(w.getframerate() or 1)
+    except Exception:
+        return 0.0
+
+
+class WinRTEngine(TTSEngine):
+    """Voix Windows OneCore via winsdk (SpeechSynthesizer + MediaPlayer)."""
+
+    name = "winrt"
+    prefix = "winrt:"
+    # Synthétiseurs prêts gardés par voix (>1 : synthèses en avance concurrentes)
+    POOL_SIZE = 4
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._player: Optional[object] = None
+        # display_name -> VoiceInformation (rechargé si une voix est inconnue)
+        self._voices: Dict[str, Any] = {}
+        self._synths: Dict[str, List[Any]] = {}
+
+    def available(self) -> bool:
+        return SpeechSynthesizer is not None and media_core is not None and media_playback is not None
+
+    def list_voices(self) -> List[Dict[str, Any]]:
+        voices: List[Dict[str, Any]] = []
+        if not self.available():
+            return voices
+        try:
+            for v in SpeechSynthesizer.all_voices:
+                display = getattr(v, "display_name", "") or ""
+                lang = getattr(v, "language", "") or ""
+                if display:
+                    voices.append({
+                        "engine": self.name,
+                        "id": f"{self.prefix}{display}",
+                        "name": f"{display} (WinRT)",
+                        "languages": [lang] if lang else [],
+                    })
+        except Exception:
+            pass
+        return voices
+
+    @staticmethod
+    def _escape_xml(s: str) -> str:
+        return (s.replace("&", "&amp;")
+                .replace("<", "&lt;")
+                .replace(">", "&gt;")
+                .replace('"', "&quot;")
+                .replace("'", "&apos;"))
+
+    @staticmethod
+    def _slider_to_speaking_rate(slider: float) -> float:
+        """
+        Slider: 0.0 (lent) -> 1.0 (normal) -> 2.0 (rapide)
+
+        WinRT SpeechSynthesizerOptions.SpeakingRate:
+        - min recommandé: 0.5
+        - normal: 1.0
+        - rapide: 2.0 (raisonnable, stable)
+        """
+        r = max(0.0, min(2.0, float(slider)))
+
+        # 0..1 : 0.5 -> 1.0
+        if r <= 1.0:
+            return 0.5 + 0.5 * r
+
+        # 1..2 : 1.0 -> 2.0
+        return 1.0 + (r - 1.0) * 1.0
+
+    def _voice_info(self, display_name: str):
+        info = self._voices.get(display_name)
+        if info is None:
+            try:
+                self._voices = {getattr(v, "display_name", ""): v for v in SpeechSynthesizer.all_voices}
+            except Exception:
+                pass
+            info = self._voices.get(display_name)
+        return info
+
+    def _acquire_synth(self, display_name: str):
+        with self._lock:
+            pool = self._synths.get(display_name)
+            if pool:
+                return pool.pop()
+        synth = SpeechSynthesizer()
+        info = self._voice_info(display_name)
+        if info is not None:
+            try:
+                synth.voice = info
+            except Exception:
+                pass
+        return synth
+
+    def _release_synth(self, display_name: str, synth):
+        with self._lock:
+            pool = self._synths.setdefault(display_name, [])
+            if len(pool) < self.POOL_SIZE:
+                pool.append(synth)
+
+    async def synthesize(self, text: str, voice_id: str, cfg) -> bytes:
+        voice_display_name = self.voice_name(voice_id)
+        info = self._voice_info(voice_display_name)
+        voice_lang = (getattr(info, "language", "") if info is not None else "") or "fr-FR"
+        synth = self._acquire_synth(voice_display_name)
+        try:
+            return await self._synthesize_with(synth, text, voice_lang, cfg)
+        finally:
+            self._release_synth(voice_display_name, synth)
+
+    async def _synthesize_with(self, synth, text: str, voice_lang: str, cfg) -> bytes:
+        # ✅ Vitesse fiable: SpeakingRate (1.0 = normal)
+        try:
+            if hasattr(synth, "options") and hasattr(synth.options, "speaking_rate"):
+                synth.options.speaking_rate = self._slider_to_speaking_rate(cfg.tts_rate)
+        except Exception:
+            pass
+
+        # ✅ SSML sans prosody rate (évite cumul d'effets)
+        ssml = (
+            f'<speak version="1.0" xmlns="http://www.w3.org/2001/10/synthesis" '
+            f'xml:lang="{voice_lang}">'
+            f'{self._escape_xml(text)}'
+            '</speak>'
+        )
+
+        stream = await synth.synthesize_ssml_to_stream_async(ssml)
+        try:
+            size = int(stream.size)
+            reader = winrt_streams.DataReader(stream.get_input_stream_at(0))
+            await reader.load_async(size)
+            data = bytearray(size)
+            reader.read_bytes(data)
+            return bytes(data)
+        finally:
+            try:
+                stream.close()
+            except Exception:
+                pass
+
+    async def _open_stream(self, audio: bytes):
+        mem = winrt_streams.InMemoryRandomAccessStream()
+        writer = winrt_streams.DataWriter(mem)
+        writer.write_bytes(audio)
+        await writer.store_async()
+        writer.detach_stream()
+        mem.seek(0)
+        return mem
+
+    async def play(self, audio: bytes, text: str, cfg, should_stop: Callable[[], bool]) -> None:
+        stream = await self._open_stream(audio)
+        player = media_playback.MediaPlayer()
+        player.source = media_core.MediaSource.create_from_stream(stream, "audio/wav")
+        player.volume = clamp(int(cfg.tts_volume), 0, 100) / 100.0
+
+        # Fin de lecture signalée par MediaEnded / MediaFailed (ou cancel()), sans polling.
+        loop = asyncio.get_running_loop()
+        done = self._arm_completion()
+        tokens = []
+        try:
+            tokens.append((player.remove_media_ended, player.add_media_ended(
+                lambda _sender, _args: self._resolve(loop, done, None)
+            )))
+            tokens.append((player.remove_media_failed, player.add_media_failed(
+                lambda _sender, args: self._resolve(loop, done, getattr(args, "error_message", "") or "échec")
+            )))
+        except Exception:
+            pass
+
+        with self._lock:
+            self._player = player
+        try:
+            if should_stop():
+                return
+            player.play()
+            # Filet de sécurité seulement (poste/driver qui ne remonte pas la fin) :
+            # durée réelle du WAV + marge, sinon l'ancienne estimation par la longueur du texte.
+            duration = wav_duration(audio)
+            max_sec = duration + 5.0 if duration > 0 else min(15 + (len(text) * 0.08), 180.0)
+            await self._wait_completion(done, max_sec)
+        finally:
+            for remove, token in tokens:
+                try:
+                    remove(token)
+                except Exception:
+                    pass
+            # cleanup : on force un arrêt propre (pause = reprise au début de phrase).
+            self.cancel()
+
+    def cancel(self) -> None:
+        super().cancel()
+        with self._lock:
+            player, self._player = self._player, None
+        if player is None:
+            return
+        try:
+            player.pause()
+        except Exception:
+            pass
+        try:
+            # force l'arrêt réel
+            player.source = None
+        except Exception:
+            pass
+
+
+class OfflineToneEngine(TTSEngine):
+    """
+    Moteur de référence hors-ligne et déterministe (tous OS) : chaque phrase devient un
+    WAV mono 16 bits (un bip par mot, silence entre les mots) dont la durée suit le texte
+    et la vitesse. La lecture attend la durée du WAV (divisée par `playback_speed`) sans
+    sortie audio ; `output_dir` garde une copie des rendus pour inspection.
+
+    Sert à tester / mesurer la file, la pause/reprise et la config à chaud sans WinRT.
+    """
+
+    name = "offline"
+    prefix = "offline:"
+
+    LANGUAGES = ("fr-FR", "en-US", "de-DE", "es-ES", "it-IT", "pt-BR", "nl-NL", "ja-JP", "zh-CN")
+
+    def __init__(self, sample_rate: int = 16000, playback_speed: float = 1.0, output_dir: Optional[Path] = None):
+        self.sample_rate = sample_rate
+        self.playback_speed = playback_speed
+        self.output_dir = output_dir
+        super().__init__()
+
+    def available(self) -> bool:
+        return True
+
+    def list_voices(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "engine": self.name,
+                "id": f"{self.prefix}Tone {lang}",
+                "name": f"Tone {lang} (offline)",
+                "languages": [lang],
+            }
+            for lang in self.LANGUAGES
+        ]
+
+    def render(self, text: str, voice_id: str = "", rate: float = 1.0) -> bytes:
+        """WAV (bytes) pour `text` : identique pour un même (texte, voix, vitesse)."""
+        sr = self.sample_rate
+        speed = WinRTEngine._slider_to_speaking_rate(rate)
+        # Fréquence propre à la voix, stable d'un lancement à l'autre
+        base = 220.0 + (zlib.crc32(voice_id.encode("utf-8")) % 220)
+        frames = bytearray()
+        for word in text.split():
+            tone = int(sr * min(0.6, 0.04 + 0.06 * len(word)) / speed)
+            gap = int(sr * 0.08 / speed)
+            freq = base + 10.0 * (len(word) % 12)
+            step = 2.0 * math.pi * freq / sr
+            samples = array.array("h", (int(6000 * math.sin(step * i)) for i in range(tone)))
+            if sys.byteorder == "big":
+                samples.byteswap()
+            frames += samples.tobytes()
+            frames += b"\0\0" * gap
+        if not frames:
+            frames = b"\0\0" * int(sr * 0.1)
+
+        out = io.BytesIO()
+        with wave.open(out, "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(sr)
+            w.writeframes(bytes(frames))
+        return out.getvalue()
+
+    async def synthesize(self, text: str, voice_id: str, cfg) -> bytes:
+        audio = self.render(text, voice_id, getattr(cfg, "tts_rate", 1.0))
+        if self.output_dir is not None:
+            try:
+                self.output_dir.mkdir(parents=True, exist_ok=True)
+                name = f"{zlib.crc32(audio):08x}.wav"
+                (self.output_dir / name).write_bytes(audio)
+            except Exception:
+                pass
+        return audio
+
+    async def play(self, audio: bytes, text: str, cfg, should_stop: Callable[[], bool]) -> None:
+        # Pas de sortie audio : la "fin de lecture" tombe après la durée du WAV.
+        done = self._arm_completion()
+        if should_stop():
+            self.cancel()
+            return
+        await self._wait_completion(done, wav_duration(audio) / max(1e-6, self.playback_speed))
+
+
+def create_engines(kind: str = "auto") -> List[TTSEngine]:
+    """
+    Moteurs actifs : "winrt"/"auto" (WinRT seul) ou "offline" (moteur de référence).
+
+    Le moteur hors-ligne ne produit aucun son audible : jamais choisi implicitement, sinon
+    un poste sans winsdk semblerait parler et la voix WinRT enregistrée serait remplacée.
+    """
+    if (kind or "auto").lower() == "offline":
+        return [OfflineToneEngine()]
+    return [WinRTEngine()]
@@ -2,24 +2,14 @@ import threading
 import asyncio
 import time
 import re
+from concurrent.futures import Future
 from typing import Optional, List, Dict, Any
 
 from PySide6.QtCore import Signal, QObject
 
-
-def clamp(n: int, lo: int, hi: int) -> int:
-    return max(lo, min(hi, n))
-
-
-# WinRT TTS (voices Windows OneCore: Julie/Paul/Hortense)
-try:
-    from winsdk.windows.media.speechsynthesis import SpeechSynthesizer
-    import winsdk.windows.media.core as media_core
-    import winsdk.windows.media.playback as media_playback
-except Exception:
-    SpeechSynthesizer = None
-    media_core = None
-    media_playback = None
+from ..memory_store import storage_dir
+from .audio_cache import AudioCache
+from .engines import TTSEngine, create_engines
 
 
 ALLOWED_WINRT_VOICES = set()
@@ -31,18 +21,65 @@ class TTSEvents(QObject):
     error = Signal(str)
 
 
+class TTSWorker:
+    """Un seul thread et une seule boucle asyncio pour toute la durée de l'app."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._run, args=(self._loop,), name="TTSWorker", daemon=True)
+                self._thread.start()
+            return self._loop
+
+    @staticmethod
+    def _run(loop: asyncio.AbstractEventLoop):
+        asyncio.set_event_loop(loop)
+        loop.run_forever()
+
+    def submit(self, coro) -> Future:
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def close(self):
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=2)
+
+
 class TTSManager:
     """
+    File de phrases, pause/reprise et config à chaud au-dessus d'un moteur (engines.py) :
     - WinRT (winsdk): voices "OneCore" (Julie/Paul/Hortense)
+    - moteur hors-ligne de référence (WAV de bips), cfg.tts_engine = "offline"
     """
-    def __init__(self, cfg=None, store=None):
+    def __init__(self, cfg=None, store=None, engines: Optional[List[TTSEngine]] = None):
         self.cfg = cfg
         self.store = store
+        self.engines = engines if engines is not None else create_engines(getattr(cfg, "tts_engine", "auto"))
         self._pause_flag = False
         self._lock = threading.Lock()
-        self._thread: Optional[threading.Thread] = None
+        self._worker = TTSWorker()
+        # Séquence en cours sur le worker (posée/effacée sous le verrou)
+        self._sequence: Optional[Future] = None
         self._stop_flag = False
-        self._winrt_player: Optional[object] = None
+        # Moteur de la séquence en cours (cancel() sur stop/pause)
+        self._engine: Optional[TTSEngine] = None
+        # Audio déjà synthétisé : relecture, retour à une langue, annonces répétées
+        self.audio_cache = AudioCache(
+            memory_bytes=int(getattr(cfg, "tts_cache_memory_mb", 32)) * 1024 * 1024,
+            disk_dir=storage_dir() / "audio_cache",
+            disk_bytes=int(getattr(cfg, "tts_cache_disk_mb", 256)) * 1024 * 1024,
+        )
         self.events = TTSEvents()
         self._queue: List[str] = []
         self._queue_index: int = 0
@@ -52,53 +89,66 @@ class TTSManager:
 
     def list_voices(self) -> List[Dict[str, Any]]:
         voices: List[Dict[str, Any]] = []
-
-        if SpeechSynthesizer is not None:
-            try:
-                for v in SpeechSynthesizer.all_voices:
-                    display = getattr(v, "display_name", "") or ""
-                    lang = getattr(v, "language", "") or ""
-                    if display:
-                        voices.append({
-                            "engine": "winrt",
-                            "id": f"winrt:{display}",
-                            "name": f"{display} (WinRT)",
-                            "languages": [lang] if lang else [],
-                        })
-            except Exception:
-                pass
-
+        for engine in self.engines:
+            if engine.available():
+                voices.extend(engine.list_voices())
         return voices
 
     def list_available_languages(self) -> List[str]:
         langs: List[str] = []
-        if SpeechSynthesizer is None:
-            return langs
-        try:
-            for v in SpeechSynthesizer.all_voices:
-                lang = getattr(v, "language", "") or ""
+        for v in self.list_voices():
+            for lang in (v.get("languages") or []):
                 if lang:
-                    langs.append(lang.lower())
-        except Exception:
-            pass
+                    langs.append(str(lang).lower())
         return sorted(set(langs))
 
-    def _winrt_voice_names(self) -> List[str]:
-        names: List[str] = []
-        if SpeechSynthesizer is None:
-            return names
-        try:
-            for v in SpeechSynthesizer.all_voices:
-                display = getattr(v, "display_name", "") or ""
-                if display:
-                    names.append(display)
-        except Exception:
-            pass
-        return names
+    def _voice_ids(self) -> set:
+        return {v.get("id") for v in self.list_voices()}
+
+    def _engine_for(self, voice_id: str) -> Optional[TTSEngine]:
+        for engine in self.engines:
+            if engine.available() and engine.owns(voice_id):
+                return engine
+        return None
+
+    async def _synthesize(self, engine: TTSEngine, text: str, voice_id: str, cfg) -> bytes:
+        """
+        Synthèse via le cache : un hit évite complètement l'appel au moteur. Le niveau
+        disque passe par l'executor, la boucle (fin de lecture, phrase suivante) n'attend
+        jamais une E/S.
+        """
+        cache = self.audio_cache
+        key = cache.key(text, voice_id, getattr(cfg, "tts_rate", 1.0))
+        audio = cache.get_memory(key)
+        if audio is not None:
+            return audio
+        loop = asyncio.get_running_loop()
+        audio = await loop.run_in_executor(None, cache.get_disk, key)
+        if audio is None:
+            audio = await engine.synthesize(text, voice_id, cfg)
+            cache.put_memory(key, audio)
+            # Écriture disque en arrière-plan, sans retarder la lecture.
+            loop.run_in_executor(None, cache.put_disk, key, audio)
+        return audio
+
+    def _should_stop(self) -> bool:
+        with self._lock:
+            return self._stop_flag
 
     def is_speaking(self) -> bool:
-        t = self._thread
-        return t is not None and t.is_alive()
+        return self._sequence is not None
+
+    def close(self, timeout: float = 2.0) -> None:
+        """Arrête la lecture, attend la fin de la séquence en cours, puis le worker (fin de l'app)."""
+        self.stop()
+        with self._lock:
+            sequence = self._sequence
+        if sequence is not None:
+            try:
+                sequence.result(timeout=timeout)
+            except Exception:
+                pass
+        self._worker.close()
 
     
     def pause(self) -> None:
@@ -106,25 +156,16 @@ class TTSManager:
         with self._lock:
             self._pause_flag = True
             self._stop_flag = True
-            player = self._winrt_player
-        if player is not None:
-            try:
-                player.pause()
-            except Exception:
-                pass
-            try:
-                player.source = None
-            except Exception:
-                pass
+            engine = self._engine
+        if engine is not None:
+            engine.cancel()
 
     def resume(self) -> None:
         """Reprend la lecture en pause (début de la phrase courante)."""
-        t = self._thread
-        if t is not None and t.is_alive():
-            with self._lock:
-                self._resume_pending = True
-            return
         with self._lock:
+            if self._sequence is not None:
+                self._resume_pending = True
+                return
             if not self._pause_flag:
                 return
             self._pause_flag = False
@@ -153,178 +194,18 @@ class TTSManager:
         with self._lock:
             return bool(getattr(self, "_ui_announcement", False))
     def stop(self) -> None:
-        # note: on sort le player du lock pour éviter les blocages
+        # note: on coupe le moteur hors du lock pour éviter les blocages
         with self._lock:
             self._stop_flag = True
             self._pause_flag = False
             self._resume_pending = False
             self._ui_announcement = False
-            player = self._winrt_player
+            engine = self._engine
             self._queue = []
             self._queue_index = 0
 
-        if player is not None:
-            try:
-                player.pause()
-            except Exception:
-                pass
-            try:
-                # force l'arrêt réel
-                player.source = None
-            except Exception:
-                pass
-
-    # ---- WinRT ----
-    @staticmethod
-    def _escape_xml(s: str) -> str:
-        return (s.replace("&", "&amp;")
-                .replace("<", "&lt;")
-                .replace(">", "&gt;")
-                .replace('"', "&quot;")
-                .replace("'", "&apos;"))
-
-    @staticmethod
-    def _slider_to_speaking_rate(slider: float) -> float:
-        """
-        Slider: 0.0 (lent) -> 1.0 (normal) -> 2.0 (rapide)
-
-        WinRT SpeechSynthesizerOptions.SpeakingRate:
-        - min recommandé: 0.5
-        - normal: 1.0
-        - rapide: 2.0 (raisonnable, stable)
-        """
-        r = max(0.0, min(2.0, float(slider)))
-
-        # 0..1 : 0.5 -> 1.0
-        if r <= 1.0:
-            return 0.5 + 0.5 * r
-
-        # 1..2 : 1.0 -> 2.0
-        return 1.0 + (r - 1.0) * 1.0
-
-    async def _winrt_speak_async(self, text: str, voice_display_name: str, cfg) -> None:
-        synth = SpeechSynthesizer()
-        voice_lang = "fr-FR"
-
-        try:
-            for v in SpeechSynthesizer.all_voices:
-                if getattr(v, "display_name", "") == voice_display_name:
-                    synth.voice = v
-                    voice_lang = getattr(v, "language", "") or voice_lang
-                    break
-        except Exception:
-            pass
-
-        # ✅ Vitesse fiable: SpeakingRate (1.0 = normal)
-        try:
-            if hasattr(synth, "options") and hasattr(synth.options, "speaking_rate"):
-                synth.options.speaking_rate = self._slider_to_speaking_rate(cfg.tts_rate)
-        except Exception:
-            pass
-
-        # ✅ SSML sans prosody rate (évite cumul d'effets)
-        ssml = (
-            f'<speak version="1.0" xmlns="http://www.w3.org/2001/10/synthesis" '
-            f'xml:lang="{voice_lang}">'
-            f'{self._escape_xml(text)}'
-            '</speak>'
-        )
-
-        stream = await synth.synthesize_ssml_to_stream_async(ssml)
-
-        player = media_playback.MediaPlayer()
-        player.source = media_core.MediaSource.create_from_stream(stream, stream.content_type)
-        player.volume = clamp(int(cfg.tts_volume), 0, 100) / 100.0
-
-        with self._lock:
-            self._winrt_player = player
-            self._stop_flag = False
-
-        player.play()
-
-        # ✅ Boucle robuste multi-postes (enums variables) + timeout anti-boucle infinie
-        State = media_playback.MediaPlaybackState
-
-        ST_PLAYING = getattr(State, "PLAYING", None) or getattr(State, "Playing", None)
-        ST_PAUSED  = getattr(State, "PAUSED", None)  or getattr(State, "Paused", None)
-        ST_STOPPED = getattr(State, "STOPPED", None) or getattr(State, "Stopped", None)
-        ST_NONE    = getattr(State, "NONE", None)    or getattr(State, "None", None)
-
-        started = False
-        t0 = time.time()
-
-        # Timeout intelligent: base + proportionnel au texte
-        # (évite tout blocage sur poste/driver qui ne remonte pas correctement l'état)
-        max_sec = 15 + (len(text) * 0.08)
-        max_sec = min(max_sec, 180.0)  # cap à 3 minutes
-
-        while True:
-            # stop demandé ?
-            with self._lock:
-                if self._stop_flag:
-                    break
-
-            # timeout sécurité
-            if (time.time() - t0) > max_sec:
-                break
-
-            try:
-                state = player.playback_session.playback_state
-            except Exception:
-                break
-
-            if ST_PLAYING is not None and state == ST_PLAYING:
-                started = True
-
-            if started:
-                # fin selon versions
-                if ST_STOPPED is not None and state == ST_STOPPED:
-                    break
-                if ST_PAUSED is not None and state == ST_PAUSED:
-                    break
-                if ST_NONE is not None and state == ST_NONE:
-                    break
-
-            await asyncio.sleep(0.05)
-
-        # cleanup : on force un arrêt propre (pause = reprise au début de phrase).
-        try:
-            player.pause()
-        except Exception:
-            pass
-        try:
-            player.source = None
-        except Exception:
-            pass
-
-    def _winrt_speak(self, text: str, cfg) -> None:
-        if SpeechSynthesizer is None or media_core is None or media_playback is None:
-            self.events.error.emit("WinRT indisponible sur ce poste.")
-            return
-
-        voice_display = cfg.tts_voice_id[len("winrt:"):] if (cfg.tts_voice_id or "").startswith("winrt:") else ""
-
-        def run():
-            try:
-                self.events.started.emit()
-                asyncio.run(run_sequence())
-            except Exception as e:
-                self.events.error.emit(str(e))
-            finally:
-                with self._lock:
-                    self._winrt_player = None
-                    self._thread = None
-                    self._ui_announcement = False
-                    resume = self._resume_pending and bool(self._queue)
-                    if resume:
-                        self._resume_pending = False
-                        self._pause_flag = False
-                self.events.finished.emit()
-                if resume:
-                    self._start_queue(self._queue_cfg)
-
-        self._thread = threading.Thread(target=run, daemon=True)
-        self._thread.start()
+        if engine is not None:
+            engine.cancel()
 
     def _split_text(self, text: str) -> List[str]:
         parts = re.split(r"([.!?]+|\n+)", text)
@@ -344,61 +225,80 @@ class TTSManager:
         return sentences
 
     def _start_queue(self, cfg) -> None:
-        if SpeechSynthesizer is None or media_core is None or media_playback is None:
-            self.events.error.emit("WinRT indisponible sur ce poste.")
-            return
-        if self._thread is not None and self._thread.is_alive():
+        voice_id = (cfg.tts_voice_id or "").strip()
+        engine = self._engine_for(voice_id)
+        if engine is None:
+            self.events.error.emit("Moteur TTS indisponible sur ce poste.")
             return
-        with self._lock:
-            self._stop_flag = False
 
-        voice_display = cfg.tts_voice_id[len("winrt:"):] if (cfg.tts_voice_id or "").startswith("winrt:") else ""
+        lookahead = max(0, int(getattr(cfg, "tts_lookahead", 2) or 0))
 
         async def run_sequence():
-            completed = True
-            for i in range(self._queue_index, len(self._queue)):
-                with self._lock:
-                    if self._stop_flag or self._pause_flag:
-                        completed = False
-                        break
-                    self._queue_index = i
-                await self._winrt_speak_async(self._queue[i], voice_display, cfg)
-                with self._lock:
-                    if self._stop_flag or self._pause_flag:
-                        completed = False
-                        break
-            with self._lock:
-                if self._pause_flag:
-                    self._stop_flag = False
-                elif self._stop_flag:
-                    self._stop_flag = False
-                    self._queue = []
-                    self._queue_index = 0
-                elif completed:
-                    self._queue = []
-                    self._queue_index = 0
-
-        def run():
+            # La fin de file est testée sous le même verrou que enqueue() : une phrase
+            # ajoutée pendant la lecture est prise, sinon le thread est relancé (finally).
+            # Les `lookahead` phrases suivantes sont synthétisées pendant la lecture.
+            i = self._queue_index
+            prefetch: Dict[int, asyncio.Task] = {}
+            try:
+                while True:
+                    with self._lock:
+                        if self._pause_flag:
+                            self._stop_flag = False
+                            return
+                        if self._stop_flag:
+                            # stop() a déjà vidé la file (et speak() a pu en poser une nouvelle)
+                            self._stop_flag = False
+                            return
+                        if i >= len(self._queue):
+                            self._queue = []
+                            self._queue_index = 0
+                            return
+                        self._queue_index = i
+                        upcoming = self._queue[i:i + 1 + lookahead]
+                    for k, text in enumerate(upcoming):
+                        if i + k not in prefetch:
+                            prefetch[i + k] = asyncio.ensure_future(self._synthesize(engine, text, voice_id, cfg))
+                    audio = await prefetch.pop(i)
+                    with self._lock:
+                        if self._stop_flag or self._pause_flag:
+                            continue
+                    await engine.play(audio, upcoming[0], cfg, self._should_stop)
+                    i += 1
+            finally:
+                # stop()/pause() : l'audio préparé d'avance est libéré tout de suite.
+                for task in prefetch.values():
+                    task.cancel()
+                if prefetch:
+                    await asyncio.gather(*prefetch.values(), return_exceptions=True)
+                prefetch.clear()
+
+        async def run():
             try:
                 self.events.started.emit()
-                asyncio.run(run_sequence())
+                await run_sequence()
             except Exception as e:
                 self.events.error.emit(str(e))
             finally:
                 with self._lock:
-                    self._winrt_player = None
-                    self._thread = None
+                    self._engine = None
+                    self._sequence = None
                     self._ui_announcement = False
                     resume = self._resume_pending and bool(self._queue)
+                    self._resume_pending = False
                     if resume:
-                        self._resume_pending = False
                         self._pause_flag = False
                 self.events.finished.emit()
                 if resume:
                     self._start_queue(self._queue_cfg)
 
-        self._thread = threading.Thread(target=run, daemon=True)
-        self._thread.start()
+        with self._lock:
+            if self._sequence is not None:
+                # Séquence précédente en train de se terminer : elle relancera la file.
+                self._resume_pending = True
+                return
+            self._stop_flag = False
+            self._engine = engine
+            self._sequence = self._worker.submit(run())
 
     # ---- Public ----
     def speak(self, text: str, cfg=None, ui_announcement: bool = False) -> None:
@@ -424,31 +324,48 @@ class TTSManager:
 
         voice_id = (cfg.tts_voice_id or "").strip()
 
-        if voice_id.startswith("winrt:"):
-            if voice_id[len("winrt:"):] not in set(self._winrt_voice_names()):
-                cfg.tts_voice_id = self._auto_pick_voice_id(prefer_lang="fr")
-                voice_id = (cfg.tts_voice_id or "").strip()
-        else:
-            cfg.tts_voice_id = self._auto_pick_voice_id(prefer_lang="fr")
-            voice_id = (cfg.tts_voice_id or "").strip()
-        if not voice_id or not voice_id.startswith("winrt:"):
-            self.events.error.emit("Voix WinRT introuvable ou indisponible.")
+        if voice_id not in self._voice_ids():
+            # La voix enregistrée n'est remplacée que par une voix réellement disponible.
+            replacement = self._auto_pick_voice_id(prefer_lang="fr")
+            if replacement:
+                cfg.tts_voice_id = voice_id = replacement
+        if not voice_id or self._engine_for(voice_id) is None:
+            self.events.error.emit("Voix TTS introuvable ou indisponible.")
             return
 
-        if voice_id.startswith("winrt:"):
-            self._queue = self._split_text(text)
-            self._queue_index = 0
-            self._queue_cfg = cfg
-            self._start_queue(cfg)
+        self._queue = self._split_text(text)
+        self._queue_index = 0
+        self._queue_cfg = cfg
+        self._start_queue(cfg)
+
+    def enqueue(self, text: str, cfg=None) -> None:
+        """Ajoute des phrases en fin de file sans couper la lecture (réponse en streaming)."""
+        if not text.strip():
+            return
+        cfg = cfg or self.cfg
+        with self._lock:
+            idle = not self._queue and not self._pause_flag and self._sequence is None
+        if idle:
+            self.speak(text, cfg)
+            return
+        sentences = self._split_text(text)
+        with self._lock:
+            self._queue.extend(sentences)
+            if self._pause_flag:
+                return
+            if self._sequence is not None:
+                # Si la séquence vient de se terminer, le finally la relancera.
+                self._resume_pending = True
+                return
+        self._start_queue(self._queue_cfg or cfg)
 
     def _auto_pick_voice_id(self, prefer_lang: str = "fr") -> str:
         voices = self.list_voices()
 
         for v in voices:
-            if v.get("engine") == "winrt":
-                langs = [str(x).lower() for x in (v.get("languages") or [])]
-                if any(l.startswith(prefer_lang) for l in langs):
-                    return v["id"]
+            langs = [str(x).lower() for x in (v.get("languages") or [])]
+            if any(l.startswith(prefer_lang) for l in langs):
+                return v["id"]
 
         return voices[0]["id"] if voices else ""
 
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import Executor
+from typing import Optional
+
+from .codex_sessions_watcher import CodexSessionsWatcher
+
+
+class AsyncCodexSessionsWatcher(CodexSessionsWatcher):
+    """
+    Variante asyncio du watcher, mêmes callbacks, pour partager une boucle d'événements.
+
+    - Les lectures de fichiers (_poll_once) sont déléguées à un executor ; les callbacks
+        sont ensuite appelés sur la boucle, jamais depuis un thread secondaire.
+    - Avec inotify, le descripteur est surveillé par la boucle (add_reader) : réveil
+        immédiat sur écriture, sinon attente de l'intervalle adaptatif.
+    - stop() réveille la boucle tout de suite (pas d'attente de join(timeout=2)).
+    - Le nettoyage des champs TTS reste sur son thread basse priorité.
+
+        watcher = AsyncCodexSessionsWatcher(cfg, on_new_message=...)
+        await watcher.start()
+        ...
+        await watcher.stop()
+    """
+
+    def __init__(self, *args, executor: Optional[Executor] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._executor = executor
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._reader_fd: Optional[int] = None
+
+    async def start(self) -> bool:
+        if self._task is not None:
+            return True
+        self._loop = asyncio.get_running_loop()
+        # Création de l'inotify et scan initial du dossier : hors de la boucle
+        if not await self._loop.run_in_executor(self._executor, self._prepare):
+            return False
+        self._stop.clear()
+        self._wakeup = asyncio.Event()
+        self._task = self._loop.create_task(self._run_async(), name="AsyncCodexSessionsWatcher")
+        return True
+
+    async def stop(self):
+        self._stop.set()
+        if self._wakeup is not None:
+            self._wakeup.set()
+        task, self._task = self._task, None
+        if task is not None:
+            # Un tour de lecture en cours dans l'executor se termine avant la fermeture.
+            await asyncio.gather(task, return_exceptions=True)
+        self._unwatch_discovery()
+        if self._loop is not None:
+            await self._loop.run_in_executor(self._executor, self._shutdown)
+
+    def _flush_outbox(self) -> bool:
+        # Appelé par _poll_once dans l'executor : la livraison se fait sur la boucle.
+        return False
+
+    async def _run_async(self):
+        loop = self._loop
+        while not self._stop.is_set():
+            try:
+                active = await loop.run_in_executor(self._executor, self._poll_once)
+            except Exception as e:
+                self.log(f"[sessions] Erreur de lecture: {e}")
+                active = False
+            if CodexSessionsWatcher._flush_outbox(self):
+                # Sauvegarde (E/S disque) hors de la boucle, avant le tour suivant.
+                await loop.run_in_executor(self._executor, self._save_progress)
+            await self._wait_async(self._interval.next(active))
+
+    async def _wait_async(self, delay: float):
+        if self._stop.is_set():
+            return
+        self._wakeup.clear()
+        self._watch_discovery()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+
+    # -------- notifications (inotify) --------
+
+    def _watch_discovery(self):
+        discovery = self._discovery
+        if self._reader_fd is not None or discovery is None or not discovery.notifies:
+            return
+        fd = discovery.fileno()
+        if fd is None:
+            return
+        try:
+            self._loop.add_reader(fd, self._on_discovery_readable)
+        except (NotImplementedError, ValueError, OSError):
+            # Boucle sans add_reader (Proactor Windows) : attente simple de l'intervalle
+            return
+        self._reader_fd = fd
+
+    def _unwatch_discovery(self):
+        fd, self._reader_fd = self._reader_fd, None
+        if fd is not None and self._loop is not None:
+            self._loop.remove_reader(fd)
+
+    def _on_discovery_readable(self):
+        # Les événements sont consommés par discovery.poll() au prochain tour ; on retire
+        # le lecteur d'ici là pour ne pas être rappelé en boucle (déclenchement par niveau).
+        self._unwatch_discovery()
+        self._wakeup.set()
@@ -5,8 +5,20 @@ import os
 import threading
 import time
 from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
-from typing import Callable, Optional, Any
+from typing import Callable, Iterator, Optional, Any
+
+from ..dedup_cache import DedupCache, stable_digest
+from ..memory_store import storage_dir
+from .rollout_index import RolloutIndex
+from .rollout_offsets import RolloutOffsets
+from .rollout_reader import RolloutTailer, iter_lines_mmap, iter_lines_reversed
+from .rollout_records import RecordParserRegistry, RolloutRecord, default_registry
+from .rollout_scrubber import RolloutScrubber, ScrubResult, ScrubWorker
+from .rollout_stream import SentenceStream
+from .session_discovery import create_discovery
+from .watcher_metrics import WatcherMetrics
 
 
 @dataclass
@@ -14,8 +26,30 @@ class CodexSessionsWatcherConfig:
     # Pattern du fichier JSONL (sessions Codex)
     pattern: str = "rollout-*.jsonl"
     poll_interval: float = 0.5  # secondes
+    # Index persistant des rollouts (None = à côté de state.json)
+    index_path: Optional[str] = None
+    index_save_interval: float = 30.0
+    # Polling : rollouts modifiés depuis moins de N secondes re-stat à chaque tour, les
+    # autres (reprise d'une ancienne session) toutes les index_restat_interval secondes
+    index_hot_window: float = 3 * 24 * 3600.0
+    index_restat_interval: float = 60.0
     # Lire uniquement la dernière réponse assistant au démarrage (sinon: se placer en fin directement)
     read_last_on_start: bool = True
+    # Taille des blocs lus depuis la fin du fichier pour retrouver la dernière réponse
+    prime_chunk_size: int = 64 * 1024
+    # Reprise au démarrage : relit depuis l'offset enregistré de chaque rollout suivi et
+    # livre les réponses manquées en un lot via on_catch_up (au plus catch_up_max_messages)
+    catch_up_on_start: bool = True
+    catch_up_max_messages: int = 50
+    offsets_path: Optional[str] = None
+    # Amorçage / rejeu via mmap (saut direct au marqueur "assistant"), sinon lecture par blocs
+    use_mmap: bool = True
+    # Sessions suivies en parallèle : tout rollout modifié depuis moins de N secondes
+    # (0 = uniquement le plus récent, comportement historique)
+    multi_session_window: float = 600.0
+    # Anti-doublon persistant (LRU d'empreintes blake2b avec TTL)
+    dedup_size: int = 512
+    dedup_ttl: float = 7 * 24 * 3600.0
     # Supprimer les champs TTS du JSONL (nettoyage best-effort)
     scrub_tts_fields: bool = True
     scrub_tts_keys: tuple[str, ...] = (
@@ -28,8 +62,52 @@ class CodexSessionsWatcherConfig:
         "audio_url",
         "audio_base64",
     )
+    # Intervalle adaptatif : resserré pendant l'écriture d'une réponse, recul
+    # exponentiel (x poll_backoff) jusqu'à poll_interval_max au repos.
+    poll_interval_min: float = 0.05
+    poll_interval_max: float = 3.0
+    poll_backoff: float = 2.0
     scrub_idle_seconds: float = 1.0
     scrub_min_interval: float = 2.0
+    # Taille max de la file du thread de nettoyage (fichiers distincts en attente)
+    scrub_queue_size: int = 64
+    # Rejeter sans json.loads les lignes qui ne contiennent pas le marqueur "assistant"
+    prefilter_assistant: bool = True
+    # Opt-in : lire les deltas d'une réponse en cours et livrer les phrases terminées
+    # via on_partial_message sans attendre la ligne response_item finale
+    stream_partial_messages: bool = False
+    # Dump périodique des métriques (JSON) ; None = désactivé
+    metrics_path: Optional[str] = None
+    metrics_dump_interval: float = 30.0
+
+
+class AdaptivePollInterval:
+    """Intervalle de polling : court quand le rollout grossit, recul exponentiel sinon."""
+
+    def __init__(self, cfg: CodexSessionsWatcherConfig):
+        self.min = max(0.001, cfg.poll_interval_min)
+        self.max = max(self.min, cfg.poll_interval_max)
+        self.backoff = max(1.0, cfg.poll_backoff)
+        self.current = min(max(cfg.poll_interval, self.min), self.max)
+
+    def next(self, active: bool) -> float:
+        if active:
+            self.current = self.min
+        else:
+            self.current = min(self.max, self.current * self.backoff)
+        return self.current
+
+
+class _SessionState:
+    """État de suivi d'un rollout (offset de lecture, nettoyage)."""
+
+    def __init__(self, path: Path, tailer: RolloutTailer):
+        self.path = path
+        self.tailer = tailer
+        self.scrub_pending = False
+        self.stream = SentenceStream()
+        # Clé anti-doublon du dernier message livré (persistée avec l'offset)
+        self.last_id = ""
 
 
 class CodexSessionsWatcher:
@@ -39,238 +117,233 @@ class CodexSessionsWatcher:
     - Au démarrage (ou changement de session), il lit le fichier pour trouver la *dernière*
         réponse assistant et n'émet QUE celle-ci (si read_last_on_start=True).
     - Ensuite il se positionne en fin de fichier et ne lit que les nouvelles lignes.
+    - Toutes les sessions actives (multi_session_window) sont suivies en parallèle, chacune
+        avec son offset et son anti-doublon ; les messages sont fusionnés par horodatage et
+        étiquetés avec le chemin de la session (on_session_message).
     """
 
+    _ASSISTANT_MARKER = b'"assistant"'
+    _DELTA_MARKER = b'delta"'
+
     def __init__(
         self,
         cfg: Optional[CodexSessionsWatcherConfig] = None,
         on_new_message: Optional[Callable[[str, str], None]] = None,
         log: Callable[[str], None] = print,
+        on_session_message: Optional[Callable[[str, Path], None]] = None,
+        parsers: Optional[RecordParserRegistry] = None,
+        on_partial_message: Optional[Callable[[str, bool], None]] = None,
+        on_catch_up: Optional[Callable[[list[RolloutRecord]], None]] = None,
     ):
         self.cfg = cfg or CodexSessionsWatcherConfig()
+        # Réponses écrites pendant que l'app était fermée, livrées en un lot au démarrage
+        self.on_catch_up = on_catch_up
+        # Mode streaming : (fragment, final) ; final=True clôt la réponse (reste du texte)
+        self.on_partial_message = on_partial_message
+        # Formats de lignes reconnus (default_registry.register(...) pour en ajouter)
+        self.parsers = parsers or default_registry
         self.on_new_message = on_new_message
+        self.on_session_message = on_session_message
         self.log = log
 
         self._stop = threading.Event()
         self._thread: Optional[threading.Thread] = None
+        self._interval = AdaptivePollInterval(self.cfg)
 
         self._root = self._codex_sessions_root()
         self._current_file: Optional[Path] = None
-        self._pos: int = 0
-
-        self._last_emitted_key: str = ""  # anti-doublon
-        self._scrub_keys = {k.lower() for k in self.cfg.scrub_tts_keys}
-        self._scrub_pending = False
-        self._last_scrub_time = 0.0
+        self._sessions: dict[Path, _SessionState] = {}
+        # Messages du tour courant :
+        # (ordre de détection, record, None | final du fragment, mtime du rollout à la lecture)
+        self._outbox: list[tuple[int, RolloutRecord, Optional[bool], float]] = []
+        self._outbox_seq = 0
+
+        # Découverte des rollouts (inotify si dispo, sinon polling) + index par mtime
+        self._discovery = None
+        index_path = Path(self.cfg.index_path) if self.cfg.index_path else storage_dir() / "rollout_index.json"
+        self._index = RolloutIndex(
+            self._root,
+            self.cfg.pattern,
+            index_path,
+            hot_window=self.cfg.index_hot_window,
+            restat_interval=self.cfg.index_restat_interval,
+        )
+        self._index_ready = False
+        self._last_index_save = 0.0
+
+        self._dedup = DedupCache(self.cfg.dedup_size, self.cfg.dedup_ttl, storage_dir() / "dedup_watcher.json")
+        self._dedup.load()
+
+        offsets_path = Path(self.cfg.offsets_path) if self.cfg.offsets_path else storage_dir() / "rollout_offsets.json"
+        self._offsets = RolloutOffsets(offsets_path)
+        self._offsets.load()
+        # Lot de reprise en cours de constitution (None hors reprise)
+        self._catch_up: Optional[list[RolloutRecord]] = None
+        self._catch_up_ready: list[RolloutRecord] = []
+
+        self._scrubber = RolloutScrubber(self.cfg.scrub_tts_keys)
+        self._scrub_worker = ScrubWorker(
+            self._scrubber,
+            idle_seconds=self.cfg.scrub_idle_seconds,
+            min_interval=self.cfg.scrub_min_interval,
+            max_jobs=self.cfg.scrub_queue_size,
+            log=log,
+        )
+        # Sérialise la lecture des tailers et la réécriture faite par le scrub worker
+        self._io_lock = threading.Lock()
+
+        # Compteurs et latences (snapshot() / dump périodique si metrics_path)
+        self.metrics = WatcherMetrics()
+        self._metrics_path = Path(self.cfg.metrics_path) if self.cfg.metrics_path else None
+        self._last_metrics_dump = time.time()
+
+    def stats(self) -> dict[str, Any]:
+        snapshot = self.metrics.snapshot()
+        snapshot["sessions"] = len(self._sessions)
+        snapshot["scrub_dropped"] = self._scrub_worker.dropped
+        snapshot["discovery"] = self._discovery.name if self._discovery is not None else None
+        return snapshot
+
+    def _maybe_dump_metrics(self, force: bool = False):
+        if self._metrics_path is None:
+            return
+        now = time.time()
+        if force or (now - self._last_metrics_dump) >= self.cfg.metrics_dump_interval:
+            self._last_metrics_dump = now
+            self.metrics.dump(self._metrics_path, extra={"sessions": len(self._sessions)})
 
     def start(self) -> bool:
-        if not self._root.exists():
-            self.log(f"[sessions] Dossier introuvable: {self._root}")
+        if not self._prepare():
             return False
-
-        self.log(f"[sessions] Watcher démarré: {self._root}")
         self._thread = threading.Thread(target=self._run, name="CodexSessionsWatcher", daemon=True)
         self._thread.start()
         return True
 
     def stop(self):
         self._stop.set()
+        if self._discovery is not None:
+            self._discovery.wake()
         if self._thread:
             self._thread.join(timeout=2)
+        self._shutdown()
+
+    def _prepare(self) -> bool:
+        """Découverte + thread de nettoyage ; False si le dossier des sessions n'existe pas."""
+        if not self._root.exists():
+            self.log(f"[sessions] Dossier introuvable: {self._root}")
+            return False
+
+        self._discovery = create_discovery(self._root, self.cfg.pattern, self.log)
+        if self.cfg.scrub_tts_fields:
+            self._scrub_worker.start()
+        self.log(f"[sessions] Watcher démarré: {self._root} ({self._discovery.name})")
+        return True
+
+    def _shutdown(self):
+        """Libère fichiers et découverte, sauvegarde index / anti-doublon / métriques."""
+        self._scrub_worker.stop()
+        for state in self._sessions.values():
+            state.tailer.close()
+        if self._discovery is not None:
+            self._discovery.close()
+        if self._index_ready:
+            self._index.save()
+        self._save_progress()
+        self._maybe_dump_metrics(force=True)
 
     def _codex_sessions_root(self) -> Path:
         home = Path(os.environ.get("USERPROFILE") or str(Path.home()))
         return home / ".codex" / "sessions"
 
     def _find_latest_rollout(self) -> Optional[Path]:
-        files = list(self._root.rglob(self.cfg.pattern))
-        if not files:
-            return None
-        return max(files, key=lambda p: p.stat().st_mtime)
-
-    # -------- extraction helpers --------
-
-    def _payload_to_text(self, payload: dict) -> str:
-        content = payload.get("content")
-        if isinstance(content, str):
-            return content.strip()
-
-        if isinstance(content, list):
-            parts = []
-            for item in content:
-                if isinstance(item, dict):
-                    # cas le plus courant: {"type":"output_text","text":"..."}
-                    txt = item.get("text")
-                    if isinstance(txt, str):
-                        parts.append(txt)
-            return "".join(parts).strip()
-
-        return ""
-
-    def _extract_assistant_text(self, obj: dict) -> Optional[tuple[str, str]]:
-        """
-        Retourne (text, key) si la ligne représente une sortie assistant.
-        key sert au dédoublonnage.
-        """
-        t = obj.get("type") or obj.get("event")
-        payload = obj.get("payload")
-
-        # Format observé: {"type":"response_item","payload":{"role":"assistant","content":[{"type":"output_text","text":"..."}]}}
-        if t == "response_item" and isinstance(payload, dict):
-            if payload.get("role") == "assistant":
-                text = self._payload_to_text(payload)
-                if text:
-                    mid = str(payload.get("id") or obj.get("id") or "")
-                    key = mid if mid else f"hash:{hash(text)}"
-                    return text, key
-
-        # Fallbacks (formats possibles)
-        role = obj.get("role") or obj.get("author")
-        if role == "assistant":
-            content = obj.get("content")
-            if isinstance(content, str) and content.strip():
-                text = content.strip()
-                key = str(obj.get("id") or f"hash:{hash(text)}")
-                return text, key
-
-        msg = obj.get("message")
-        if isinstance(msg, dict):
-            r = msg.get("role") or msg.get("author")
-            if r == "assistant":
-                c = msg.get("content")
-                if isinstance(c, str) and c.strip():
-                    text = c.strip()
-                    key = str(msg.get("id") or obj.get("id") or f"hash:{hash(text)}")
-                    return text, key
-
-        return None
-
-    # -------- scrubbing helpers --------
-
-    def _scrub_any(self, value: Any) -> bool:
-        """Remove TTS keys recursively. Return True if changed."""
-        changed = False
+        if not self._index_ready:
+            # Démarrage : index sauvegardé + validation par mtime des dossiers
+            self._index.load_or_scan()
+            self._index_ready = True
+
+        discovery = self._discovery
+        changed = discovery.poll() if discovery is not None else None
+        if changed is not None:
+            for p in changed:
+                self._index.update(p)
+        elif discovery is not None and discovery.notifies:
+            # Débordement de la file de notifications : seul cas de rescan complet.
+            self.log("[sessions] File de notifications saturée, rescan complet")
+            self.metrics.rescans += 1
+            self._index.full_scan()
+        else:
+            extra = {p.parent for p in self._sessions}
+            self.metrics.refreshes += 1
+            self._index.refresh(extra_dirs=extra)
 
-        if isinstance(value, dict):
-            keys_to_delete = [k for k in value.keys() if k.lower() in self._scrub_keys]
-            for k in keys_to_delete:
-                del value[k]
-                changed = True
-            for k, v in list(value.items()):
-                if self._scrub_any(v):
-                    changed = True
-            return changed
+        now = time.time()
+        if (now - self._last_index_save) >= self.cfg.index_save_interval:
+            self._last_index_save = now
+            self._index.save()
+            self._save_progress()
 
-        if isinstance(value, list):
-            for item in value:
-                if self._scrub_any(item):
-                    changed = True
-            return changed
+        return self._index.latest()
 
-        return False
+    def _save_progress(self):
+        """Offsets + anti-doublon : après chaque livraison, un redémarrage ne relit rien de déjà livré."""
+        self._save_offsets()
+        self._dedup.save()
 
-    def _scrub_jsonl_file(self, fpath: Path) -> bool:
-        if not self.cfg.scrub_tts_fields:
-            return False
+    def _save_offsets(self):
+        for state in list(self._sessions.values()):
+            self._offsets.set(state.path, state.tailer.pos, state.last_id)
+        self._offsets.save()
 
-        try:
-            before = fpath.stat()
-        except Exception:
-            return False
+    # -------- extraction helpers --------
 
-        changed_any = False
-        out_lines: list[str] = []
+    def _parse_record(self, obj: dict, session: Optional[Path] = None) -> Optional[RolloutRecord]:
+        """Retourne la réponse assistant portée par la ligne (dispatch par type), sinon None."""
+        return self.parsers.parse(obj, session)
 
-        try:
-            with fpath.open("r", encoding="utf-8") as f:
-                for line in f:
-                    raw_line = line
-                    newline = "\n"
-                    if raw_line.endswith("\r\n"):
-                        newline = "\r\n"
-                    elif raw_line.endswith("\n"):
-                        newline = "\n"
-                    else:
-                        newline = ""
-                    line = line.strip()
-                    if not line:
-                        out_lines.append(raw_line)
-                        continue
-                    try:
-                        obj = json.loads(line)
-                    except Exception:
-                        out_lines.append(raw_line)
-                        continue
-
-                    changed = self._scrub_any(obj)
-                    if changed:
-                        changed_any = True
-                        out_lines.append(json.dumps(obj, ensure_ascii=False, separators=(",", ":")) + newline)
-                    else:
-                        out_lines.append(raw_line)
-        except Exception:
-            return False
+    def _has_assistant_marker(self, raw: bytes) -> bool:
+        if not self.cfg.prefilter_assistant or self._ASSISTANT_MARKER in raw:
+            return True
+        return self._streaming() and self._DELTA_MARKER in raw
 
-        if not changed_any:
-            return False
+    def _streaming(self) -> bool:
+        return self.cfg.stream_partial_messages and self.on_partial_message is not None
 
-        try:
-            after = fpath.stat()
-            if (after.st_mtime_ns != before.st_mtime_ns) or (after.st_size != before.st_size):
-                return False
-        except Exception:
-            return False
+    def _may_need_scrub(self, raw: bytes) -> bool:
+        return self.cfg.scrub_tts_fields and self._scrubber.may_contain_keys(raw)
 
-        tmp_path = fpath.with_suffix(fpath.suffix + ".tmp")
+    def _decode_line(self, raw: bytes) -> Optional[dict]:
+        metrics = self.metrics
+        metrics.lines_decoded += 1
+        started = time.perf_counter()
         try:
-            with tmp_path.open("w", encoding="utf-8") as f:
-                f.writelines(out_lines)
-            # Re-verifie juste avant le replace pour eviter d'ecraser de nouvelles lignes.
-            latest = fpath.stat()
-            if (latest.st_mtime_ns != before.st_mtime_ns) or (latest.st_size != before.st_size):
-                try:
-                    tmp_path.unlink()
-                except Exception:
-                    pass
-                return False
-            tmp_path.replace(fpath)
+            obj = json.loads(raw)
         except Exception:
-            try:
-                if tmp_path.exists():
-                    tmp_path.unlink()
-            except Exception:
-                pass
-            return False
+            return None
+        finally:
+            metrics.decode.observe((time.perf_counter() - started) * 1e6)
+        return obj if isinstance(obj, dict) else None
 
-        return True
+    # -------- scrubbing helpers --------
 
-    def _maybe_scrub_file(self, fpath: Path):
+    def _request_scrub(self, state: _SessionState):
+        """Confie le nettoyage au thread dédié : le watcher n'attend jamais la réécriture."""
         if not self.cfg.scrub_tts_fields:
             return
+        # Seules les lignes déjà lues par le tailer sont nettoyées, réécrites à longueur
+        # constante : la position de lecture reste valide.
+        if self._scrub_worker.submit(state.path, state.tailer.pos, self._io_lock, partial(self._on_scrubbed, state)):
+            state.scrub_pending = False
 
-        now = time.time()
-        if (now - self._last_scrub_time) < self.cfg.scrub_min_interval:
-            return
-
-        try:
-            st = fpath.stat()
-        except Exception:
-            return
-
-        if (now - st.st_mtime) < self.cfg.scrub_idle_seconds:
-            return
-
-        if self._scrub_jsonl_file(fpath):
-            self._last_scrub_time = now
-            try:
-                self._pos = fpath.stat().st_size
-            except Exception:
-                self._pos = 0
-            self._scrub_pending = False
+    def _on_scrubbed(self, state: _SessionState, result: ScrubResult):
+        if result.changed:
+            self.metrics.scrubs += 1
 
     # -------- behavior --------
 
-    def _emit(self, text: str):
+    def _emit(self, record: RolloutRecord):
+        text = record.text
+        if self.on_session_message and record.session is not None:
+            self.on_session_message(text, record.session)
         if not self.on_new_message:
             return
         try:
@@ -279,88 +352,367 @@ class CodexSessionsWatcher:
             # compat si callback ne prend qu'un arg
             self.on_new_message(text)
 
-    def _prime_last_message(self, fpath: Path):
-        """Lit tout le fichier et n'émet QUE la dernière réponse assistant."""
-        if not self.cfg.read_last_on_start:
+    @staticmethod
+    def _message_key(state: _SessionState, record: RolloutRecord) -> str:
+        # Sans id, la clé est propre à la session et à l'horodatage : une même phrase
+        # redite plus tard ("Done.") reste une nouvelle réponse.
+        return stable_digest(record.text, record.id or f"session:{state.path.name}|{record.timestamp}")
+
+    def _queue_message(self, state: _SessionState, record: RolloutRecord, force: bool = False):
+        key = self._message_key(state, record)
+        if record.id or record.timestamp:
+            fresh = self._dedup.check_and_add(key)
+        else:
+            # Aucune identité : seule la répétition consécutive est écartée.
+            fresh = key != state.last_id
+        if not fresh and not force:
             return
+        state.last_id = key
+        if self._catch_up is not None and not force:
+            self._catch_up.append(record)
+            return
+        if state.stream.started:
+            # Réponse déjà partiellement livrée : on ne livre que la fin.
+            tail = state.stream.finish(record.text)
+            fragment = RolloutRecord(tail, record.id, record.session, record.timestamp, True)
+            self._queue_fragment(state, fragment, final=True)
+            return
+        self._outbox_seq += 1
+        self._outbox.append((self._outbox_seq, record, None, state.tailer.mtime))
+
+    def _queue_fragment(self, state: _SessionState, record: RolloutRecord, final: bool):
+        self._outbox_seq += 1
+        self._outbox.append((self._outbox_seq, record, final, state.tailer.mtime))
+
+    def _handle_delta(self, state: _SessionState, record: RolloutRecord):
+        for text in state.stream.feed(record.text):
+            fragment = RolloutRecord(text, record.id, record.session, record.timestamp, True)
+            self._queue_fragment(state, fragment, final=False)
+
+    def _notify(self, callback: Callable, *args) -> bool:
+        """Appelle un callback utilisateur ; une exception est journalisée, pas propagée."""
+        try:
+            callback(*args)
+            return True
+        except Exception as e:
+            self.log(f"[sessions] Erreur dans le callback {getattr(callback, '__name__', callback)}: {e}")
+            return False
 
-        last_text: Optional[str] = None
-        last_key: Optional[str] = None
+    def _flush_outbox(self) -> bool:
+        """
+        Émet les messages du tour, toutes sessions confondues, dans l'ordre chronologique.
+        Retourne True si des réponses complètes (ou un lot de reprise) ont été livrées.
+        """
+        delivered = False
+        if self._catch_up_ready:
+            batch, self._catch_up_ready = self._catch_up_ready, []
+            if self.on_catch_up:
+                self._notify(self.on_catch_up, batch)
+            delivered = True
+        if not self._outbox:
+            return delivered
+        outbox, self._outbox = self._outbox, []
+        # Horodatages ISO 8601 comparables en texte ; à défaut, ordre de détection.
+        outbox.sort(key=lambda m: (m[1].timestamp, m[0]) if m[1].timestamp else ("~", m[0]))
+        metrics = self.metrics
+        for _, record, final, mtime in outbox:
+            if final is None:
+                delivered = True
+                if self._notify(self._emit, record):
+                    metrics.messages_emitted += 1
+            elif self.on_partial_message:
+                if self._notify(self.on_partial_message, record.text, final):
+                    metrics.fragments_emitted += 1
+            # Amorçage (fichier pas encore lu par le tailer) : pas de latence mesurable
+            if mtime:
+                metrics.mtime_to_emit.observe(max(0.0, time.time() - mtime) * 1000.0)
+        return delivered
+
+    def _scan_lines(self, fpath: Path, reverse: bool = False) -> Iterator[bytes]:
+        """
+        Lignes d'un rollout susceptibles de porter une réponse complète (préfiltre appliqué),
+        vers l'avant ou depuis EOF : mmap si possible, sinon lecture par blocs.
+        """
+        marker = self._ASSISTANT_MARKER if self.cfg.prefilter_assistant else None
+        if self.cfg.use_mmap:
+            started = False
+            try:
+                for line in iter_lines_mmap(fpath, marker, reverse):
+                    started = True
+                    yield line
+                return
+            except (OSError, ValueError):
+                # Projection impossible (fichier vide, FS exotique) : lecture classique.
+                if started:
+                    raise
+
+        if reverse:
+            lines = iter_lines_reversed(fpath, self.cfg.prime_chunk_size)
+        else:
+            lines = open(fpath, "rb", buffering=self.cfg.prime_chunk_size)
+        try:
+            for line in lines:
+                if marker is not None and marker not in line:
+                    self.metrics.lines_skipped += 1
+                    continue
+                yield line
+        finally:
+            lines.close()
+
+    def iter_records(self, fpath: Path):
+        """
+        Parcourt un rollout du début à la fin et produit chaque réponse assistant complète
+        (même préfiltre et mêmes parseurs que le suivi en direct, sans anti-doublon).
+        """
+        for line in self._scan_lines(fpath):
+            obj = self._decode_line(line)
+            if obj is None:
+                continue
+            record = self._parse_record(obj, fpath)
+            if record is not None and not record.partial:
+                yield record
+
+    def _prime_last_message(self, state: _SessionState, force: bool = False):
+        """
+        Remonte le fichier depuis la fin et n'émet QUE la dernière réponse assistant.
+        force=True (démarrage) l'émet même si déjà vue, pour initialiser l'UI.
+        """
+        if not self.cfg.read_last_on_start:
+            return
 
         try:
-            with fpath.open("r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    try:
-                        obj = json.loads(line)
-                    except Exception:
-                        continue
-                    res = self._extract_assistant_text(obj)
-                    if res:
-                        last_text, last_key = res
+            for line in self._scan_lines(state.path, reverse=True):
+                obj = self._decode_line(line)
+                if obj is None:
+                    continue
+                record = self._parse_record(obj, state.path)
+                if record is not None and not record.partial:
+                    self._queue_message(state, record, force=force)
+                    return
         except Exception:
             return
 
-        if last_text and last_key and last_key != self._last_emitted_key:
-            self._last_emitted_key = last_key
-            self._emit(last_text)
+    def _handle_line(self, state: _SessionState, raw: bytes):
+        try:
+            self._process_line(state, raw)
+        except Exception as e:
+            # Ligne inattendue (parseur tiers, format inconnu) : ignorée, le suivi continue.
+            self.log(f"[sessions] Ligne ignorée ({state.path.name}): {e}")
+
+    def _process_line(self, state: _SessionState, raw: bytes):
+        assistant = self._has_assistant_marker(raw)
+        needs_scrub = self._may_need_scrub(raw)
+        if not assistant and not needs_scrub:
+            self.metrics.lines_skipped += 1
+            return
+        obj = self._decode_line(raw)
+        if obj is None:
+            return
 
-    def _run(self):
-        while not self._stop.is_set():
-            latest = self._find_latest_rollout()
+        if assistant:
+            record = self._parse_record(obj, state.path)
+            if record is not None:
+                if not record.partial:
+                    self._queue_message(state, record)
+                elif self._streaming():
+                    self._handle_delta(state, record)
 
-            # nouveau fichier (nouvelle session ou activity)
-            if latest and latest != self._current_file:
-                self._current_file = latest
-                self.log(f"[sessions] Fichier suivi: {latest}")
+        # L'arbre n'est parcouru que si la regex des clés TTS a matché sur les octets.
+        if needs_scrub and self._scrubber.has_keys(obj):
+            state.scrub_pending = True
 
-                # 1) émettre uniquement la dernière réponse assistant existante
-                self._prime_last_message(latest)
-                if self.cfg.scrub_tts_fields:
-                    self._scrub_pending = True
-                    self._maybe_scrub_file(latest)
+    def _open_session(
+        self,
+        fpath: Path,
+        prime: bool,
+        from_start: bool = False,
+        force: bool = False,
+        catch_up: bool = False,
+    ) -> _SessionState:
+        """
+        Commence à suivre un rollout. Un fichier apparu pendant que le watcher tourne est lu
+        depuis le début ; sinon on émet (prime) sa dernière réponse puis on se place en fin.
+        catch_up=True (démarrage) : lit d'abord ce qui a été écrit depuis l'offset enregistré.
+        """
+        try:
+            pos = 0 if from_start else fpath.stat().st_size
+        except Exception:
+            pos = 0
+        state = _SessionState(fpath, RolloutTailer(fpath, pos))
+        self._sessions[fpath] = state
+        self.log(f"[sessions] Fichier suivi: {fpath}")
+
+        if catch_up and not from_start:
+            missed = len(self._catch_up or ())
+            self._catch_up_session(state)
+            # Sa dernière réponse est déjà dans le lot de reprise : pas d'amorçage en double.
+            if len(self._catch_up or ()) > missed:
+                prime = False
+
+        if prime and not from_start:
+            self._prime_last_message(state, force=force)
+        if self.cfg.scrub_tts_fields:
+            state.scrub_pending = True
+            self._request_scrub(state)
+        return state
+
+    def _catch_up_session(self, state: _SessionState):
+        """
+        Collecte (dans self._catch_up) les réponses écrites depuis l'offset enregistré, en
+        une seule lecture. Si le fichier a été remplacé, on repart du dernier id livré.
+        """
+        entry = self._offsets.get(state.path)
+        if entry is None or self._catch_up is None:
+            return
+        state.last_id = entry.last_id
+        resume = self._offsets.resume_offset(state.path)
+        try:
+            if resume is not None:
+                if resume >= state.tailer.pos:
+                    return
+                with self._io_lock:
+                    state.tailer.seek(resume)
+                    lines = state.tailer.read_lines()
+                for line in lines:
+                    self._handle_line(state, line)
+                state.stream = SentenceStream()
+            elif entry.last_id:
+                found = False
+                for record in self.iter_records(state.path):
+                    if found:
+                        self._queue_message(state, record)
+                    elif self._message_key(state, record) == entry.last_id:
+                        found = True
+        except Exception as e:
+            self.log(f"[sessions] Reprise impossible ({state.path}): {e}")
+
+    def _catch_up_detached(self, fpath: Path):
+        """Reprise d'un rollout hors fenêtre qui a grossi pendant la fermeture, sans le suivre."""
+        resume = self._offsets.resume_offset(fpath)
+        try:
+            size = fpath.stat().st_size
+        except OSError:
+            return
+        if resume is None or resume >= size:
+            return
+        state = _SessionState(fpath, RolloutTailer(fpath, size))
+        try:
+            self._catch_up_session(state)
+            self._offsets.set(fpath, state.tailer.pos, state.last_id)
+        finally:
+            state.tailer.close()
+
+    def _close_session(self, fpath: Path):
+        state = self._sessions.pop(fpath, None)
+        if state is not None:
+            self._offsets.set(fpath, state.tailer.pos, state.last_id)
+            state.tailer.close()
+            self.log(f"[sessions] Fin de suivi: {fpath}")
+
+    def _update_sessions(self, latest: Optional[Path], starting: bool) -> bool:
+        """Ouvre les sessions devenues actives, ferme celles sorties de la fenêtre."""
+        window = self.cfg.multi_session_window
+        since = time.time() - window
+        changed = False
 
-                # 2) puis se placer en fin
-                try:
-                    self._pos = latest.stat().st_size
-                except Exception:
-                    self._pos = 0
+        if starting:
+            self._index.pop_touched()
+            catch_up = self.cfg.catch_up_on_start and self.on_catch_up is not None
+            if catch_up:
+                self._catch_up = []
+            candidates = self._index.recent(since) if window > 0 else []
+            for p in sorted(candidates, key=lambda c: self._index.mtime(c) or 0.0):
+                if p != latest:
+                    self._open_session(p, prime=False, catch_up=catch_up)
+            if latest is not None:
+                self._open_session(latest, prime=True, force=True, catch_up=catch_up)
+            if catch_up:
+                # La fenêtre décide des sessions suivies, pas des réponses manquées relues.
+                for p in self._offsets.paths():
+                    if p not in self._sessions:
+                        self._catch_up_detached(p)
+                self._finish_catch_up()
+            return bool(self._sessions)
+
+        touched = self._index.pop_touched()
+        if window > 0:
+            for p, is_new in touched.items():
+                if p in self._sessions:
+                    continue
+                mtime = self._index.mtime(p)
+                if mtime is not None and mtime >= since:
+                    self._open_session(p, prime=True, from_start=is_new)
+                    changed = True
+        if latest is not None and latest not in self._sessions:
+            self._open_session(latest, prime=True, from_start=touched.get(latest, False))
+            changed = True
 
-            if not self._current_file:
-                time.sleep(self.cfg.poll_interval)
+        for p in list(self._sessions):
+            if p == latest:
                 continue
+            mtime = self._index.mtime(p)
+            if mtime is None or mtime < since:
+                self._close_session(p)
+        return changed
+
+    def _finish_catch_up(self):
+        batch, self._catch_up = self._catch_up or [], None
+        # Fragments en attente de la reprise : déjà couverts par les réponses complètes
+        self._outbox = [m for m in self._outbox if m[2] is None]
+        if not batch:
+            return
+        batch.sort(key=lambda r: r.timestamp or "~")
+        limit = max(1, self.cfg.catch_up_max_messages)
+        self._catch_up_ready = batch[-limit:]
+        self.log(f"[sessions] Reprise: {len(batch)} réponse(s) manquée(s)")
+
+    def _poll_once(self) -> bool:
+        """Un tour de surveillance. Retourne True s'il y a eu de l'activité."""
+        starting = not self._index_ready
+        latest = self._find_latest_rollout()
+        active = self._update_sessions(latest, starting)
+        self._current_file = latest
+
+        for state in list(self._sessions.values()):
+            tailer = state.tailer
+            before = tailer.bytes_read
+            lines: list[bytes] = []
+            with self._io_lock:
+                try:
+                    lines = tailer.read_lines()
+                except Exception:
+                    # fichier en cours d'écriture/rotation : on rouvrira au prochain tour
+                    tailer.close()
+            for line in lines:
+                self._handle_line(state, line)
+            if tailer.bytes_read != before:
+                self.metrics.bytes_read += tailer.bytes_read - before
+                active = True
+                # La session reste active même si l'index n'a pas encore vu l'écriture.
+                self._index.update(state.path)
+
+            if state.scrub_pending:
+                self._request_scrub(state)
+
+        if self._flush_outbox():
+            self._save_progress()
+        self._maybe_dump_metrics()
+        return active
+
+    def _wait(self, delay: float):
+        discovery = self._discovery
+        if discovery is not None and discovery.notifies:
+            # Réveil immédiat sur notification (ou stop()), sinon au bout de `delay`.
+            discovery.wait(delay)
+        else:
+            self._stop.wait(delay)
 
+    def _run(self):
+        while not self._stop.is_set():
             try:
-                with self._current_file.open("r", encoding="utf-8") as f:
-                    f.seek(self._pos)
-                    for line in f:
-                        line = line.strip()
-                        if not line:
-                            continue
-                        try:
-                            obj = json.loads(line)
-                        except Exception:
-                            continue
-
-                        res = self._extract_assistant_text(obj)
-                        if res:
-                            text, key = res
-                            if key != self._last_emitted_key:
-                                self._last_emitted_key = key
-                                self._emit(text)
-
-                        if self.cfg.scrub_tts_fields and self._scrub_any(obj):
-                            self._scrub_pending = True
-
-                    self._pos = f.tell()
-
-            except Exception:
-                # fichier en cours d'écriture/rotation
-                pass
-
-            if self._current_file and self._scrub_pending:
-                self._maybe_scrub_file(self._current_file)
-
-            time.sleep(self.cfg.poll_interval)
+                active = self._poll_once()
+                self._wait(self._interval.next(active))
+            except Exception as e:
+                # Le thread ne doit jamais mourir : on journalise et on réessaie plus tard.
+                self.log(f"[sessions] Erreur de surveillance: {e}")
+                self._stop.wait(self.cfg.poll_interval)
@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import heapq
+import json
+import os
+import time
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Iterable, Optional
+
+
+class RolloutIndex:
+    """
+    Index incrémental des rollouts (chemin -> mtime) avec un tas pour obtenir le plus
+    récent en O(1) amorti.
+
+    - Les mtimes des dossiers sont mémorisés : seuls les dossiers dont le mtime change
+        sont relistés (création/suppression de fichiers), jamais toute l'arborescence.
+    - L'index est sauvegardé sur disque ; au démarrage il est rechargé puis validé contre
+        les mtimes des dossiers au lieu de reparcourir des années de sessions.
+    - En polling, un ajout dans un rollout existant ne change pas le mtime du dossier :
+        les rollouts récents (hot_window) sont re-stat à chaque tour, tous les autres (et
+        tous les dossiers) au plus une fois par restat_interval (ex. `codex resume`).
+    """
+
+    VERSION = 1
+
+    def __init__(
+        self,
+        root: Path,
+        pattern: str,
+        path: Optional[Path] = None,
+        hot_window: float = 3 * 24 * 3600.0,
+        restat_interval: float = 60.0,
+    ):
+        self.root = root
+        self.pattern = pattern
+        self.path = path
+        self.hot_window = hot_window
+        self.restat_interval = restat_interval
+        self._last_restat = 0.0
+
+        self._mtimes: dict[str, float] = {}
+        self._heap: list[tuple[float, str]] = []
+        self._dirs: dict[str, int] = {}
+        self._dir_files: dict[str, set[str]] = {}
+        self._dirty = False
+        # Rollouts dont le mtime a changé depuis pop_touched() (chemin -> nouveau fichier ?)
+        self._touched: dict[str, bool] = {}
+
+    def __len__(self) -> int:
+        return len(self._mtimes)
+
+    # -------- fichiers --------
+
+    def _set(self, fpath: str, mtime: float):
+        previous = self._mtimes.get(fpath)
+        if previous == mtime:
+            return
+        self._touched[fpath] = self._touched.get(fpath, previous is None)
+        self._mtimes[fpath] = mtime
+        self._dir_files.setdefault(os.path.dirname(fpath), set()).add(fpath)
+        heapq.heappush(self._heap, (-mtime, fpath))
+        self._dirty = True
+        # Compacte le tas quand les entrées périmées dominent.
+        if len(self._heap) > 2 * len(self._mtimes) + 64:
+            self._heap = [(-m, p) for p, m in self._mtimes.items()]
+            heapq.heapify(self._heap)
+
+    def _discard(self, fpath: str):
+        if self._mtimes.pop(fpath, None) is not None:
+            files = self._dir_files.get(os.path.dirname(fpath))
+            if files is not None:
+                files.discard(fpath)
+            self._dirty = True
+
+    def update(self, path: Path):
+        """Re-stat un rollout signalé comme créé/modifié/supprimé."""
+        fpath = str(path)
+        try:
+            self._set(fpath, os.stat(fpath).st_mtime)
+        except OSError:
+            self._discard(fpath)
+
+    def restat(self, since: Optional[float] = None):
+        """Re-stat les rollouts indexés (ceux modifiés après `since`, ou tous)."""
+        for fpath, mtime in list(self._mtimes.items()):
+            if since is not None and mtime < since:
+                continue
+            try:
+                self._set(fpath, os.stat(fpath).st_mtime)
+            except OSError:
+                self._discard(fpath)
+
+    def mtime(self, path: Path) -> Optional[float]:
+        return self._mtimes.get(str(path))
+
+    def pop_touched(self) -> dict[Path, bool]:
+        """Rollouts modifiés depuis le dernier appel, avec True pour ceux apparus entre-temps."""
+        touched, self._touched = self._touched, {}
+        return {Path(p): is_new for p, is_new in touched.items()}
+
+    def recent(self, since: float) -> list[Path]:
+        """Rollouts modifiés après `since` (parcours linéaire, réservé au démarrage)."""
+        return [Path(p) for p, m in self._mtimes.items() if m >= since]
+
+    def latest(self) -> Optional[Path]:
+        heap = self._heap
+        while heap:
+            neg_mtime, fpath = heap[0]
+            if self._mtimes.get(fpath) == -neg_mtime:
+                return Path(fpath)
+            heapq.heappop(heap)
+        return None
+
+    # -------- dossiers --------
+
+    def _scan_dir(self, directory: str):
+        """Liste un dossier (sans récursion sauf pour les sous-dossiers inconnus)."""
+        try:
+            dir_mtime = os.stat(directory).st_mtime_ns
+            entries = list(os.scandir(directory))
+        except OSError:
+            self._drop_dir(directory)
+            return
+
+        present: set[str] = set()
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.path not in self._dirs:
+                        self._scan_dir(entry.path)
+                elif fnmatch(entry.name, self.pattern):
+                    present.add(entry.path)
+                    self._set(entry.path, entry.stat().st_mtime)
+            except OSError:
+                continue
+
+        for fpath in self._dir_files.get(directory, set()) - present:
+            self._discard(fpath)
+        if self._dirs.get(directory) != dir_mtime:
+            self._dirs[directory] = dir_mtime
+            self._dirty = True
+
+    def _drop_dir(self, directory: str):
+        prefix = directory + os.sep
+        for d in [d for d in self._dirs if d == directory or d.startswith(prefix)]:
+            del self._dirs[d]
+            for fpath in list(self._dir_files.pop(d, ())):
+                self._mtimes.pop(fpath, None)
+            self._dirty = True
+
+    def _check_dir(self, directory: str) -> bool:
+        """Reliste le dossier si son mtime a changé. Retourne True si relisté."""
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            self._drop_dir(directory)
+            return False
+        if self._dirs.get(directory) == mtime:
+            return False
+        self._scan_dir(directory)
+        return True
+
+    def full_scan(self):
+        self._mtimes.clear()
+        self._heap.clear()
+        self._dirs.clear()
+        self._dir_files.clear()
+        self._dirty = True
+        self._scan_dir(str(self.root))
+
+    def validate(self):
+        """Après chargement : ne reliste que les dossiers dont le mtime a changé."""
+        root = str(self.root)
+        if root not in self._dirs:
+            self.full_scan()
+            return
+        self._check_dirs()
+        # Un ajout dans un fichier ne change pas le mtime du dossier : tous les rollouts
+        # indexés sont re-stat (reprise d'une ancienne session pendant la fermeture).
+        self.restat()
+        self._last_restat = time.time()
+
+    def _check_dirs(self):
+        for directory in sorted(self._dirs, key=len):
+            if directory in self._dirs:
+                self._check_dir(directory)
+
+    def refresh(self, extra_dirs: Iterable[Path] = ()):
+        """
+        Rafraîchissement périodique en mode polling : vérifie la chaîne de dossiers du
+        jour (racine/AAAA/MM/JJ), re-stat les rollouts du dossier courant et les rollouts
+        récents ; dossiers et rollouts plus anciens au plus une fois par restat_interval.
+        """
+        root = str(self.root)
+        chain = [root]
+        for part in time.strftime("%Y/%m/%d").split("/"):
+            chain.append(os.path.join(chain[-1], part))
+        for directory in chain[:-1]:
+            if os.path.isdir(directory):
+                self._check_dir(directory)
+        day_dirs = {chain[-1], *(str(d) for d in extra_dirs)}
+        for directory in day_dirs:
+            if os.path.isdir(directory):
+                self._scan_dir(directory)
+
+        now = time.time()
+        if (now - self._last_restat) >= self.restat_interval:
+            self._last_restat = now
+            self._check_dirs()
+            self.restat()
+        else:
+            self.restat(since=now - self.hot_window)
+
+    # -------- persistance --------
+
+    def load(self) -> bool:
+        if self.path is None or not self.path.exists():
+            return False
+        try:
+            raw = json.loads(self.path.read_text(encoding="utf-8"))
+        except Exception:
+            return False
+        if not isinstance(raw, dict) or raw.get("version") != self.VERSION or raw.get("root") != str(self.root):
+            return False
+        try:
+            dirs = {str(k): int(v) for k, v in (raw.get("dirs") or {}).items()}
+            files = {str(k): float(v) for k, v in (raw.get("files") or {}).items()}
+        except (TypeError, ValueError, AttributeError):
+            return False
+
+        self._dirs = dirs
+        self._mtimes = files
+        self._dir_files = {}
+        for fpath in files:
+            self._dir_files.setdefault(os.path.dirname(fpath), set()).add(fpath)
+        self._heap = [(-m, p) for p, m in files.items()]
+        heapq.heapify(self._heap)
+        self._dirty = False
+        return True
+
+    def load_or_scan(self):
+        if self.load():
+            self.validate()
+        else:
+            self.full_scan()
+
+    def save(self, force: bool = False):
+        if self.path is None or not (self._dirty or force):
+            return
+        data = {
+            "version": self.VERSION,
+            "root": str(self.root),
+            "dirs": self._dirs,
+            "files": self._mtimes,
+        }
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+            tmp_path.replace(self.path)
+            self._dirty = False
+        except Exception:
+            pass
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+
+@dataclass
+class RolloutOffset:
+    dev: int
+    ino: int
+    # Octet jusqu'auquel le rollout a été lu et traité
+    offset: int
+    # Id (ou empreinte) du dernier message livré
+    last_id: str = ""
+    saved_at: float = 0.0
+
+
+class RolloutOffsets:
+    """
+    Positions de lecture par rollout, persistées pour reprendre après un redémarrage.
+
+    Un offset n'est réutilisé que si le fichier est le même (dev/inode) et n'a pas
+    rétréci ; sinon on retombe sur l'amorçage classique (dernière réponse).
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: Optional[Path] = None, max_entries: int = 256, max_age: float = 7 * 24 * 3600.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._entries: dict[str, RolloutOffset] = {}
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def paths(self) -> list[Path]:
+        return [Path(key) for key in self._entries]
+
+    def get(self, fpath: Path) -> Optional[RolloutOffset]:
+        return self._entries.get(str(fpath))
+
+    def resume_offset(self, fpath: Path) -> Optional[int]:
+        """Offset de reprise si `fpath` est toujours le fichier enregistré, sinon None."""
+        entry = self.get(fpath)
+        if entry is None:
+            return None
+        try:
+            st = os.stat(fpath)
+        except OSError:
+            return None
+        if (st.st_dev, st.st_ino) != (entry.dev, entry.ino) or st.st_size < entry.offset:
+            return None
+        return entry.offset
+
+    def set(self, fpath: Path, offset: int, last_id: str = ""):
+        key = str(fpath)
+        previous = self._entries.get(key)
+        if previous is not None and previous.offset == offset and previous.last_id == last_id:
+            return
+        try:
+            st = os.stat(fpath)
+        except OSError:
+            return
+        self._entries[key] = RolloutOffset(st.st_dev, st.st_ino, offset, last_id, time.time())
+        self._dirty = True
+
+    def _prune(self):
+        cutoff = time.time() - self.max_age
+        entries = [(k, e) for k, e in self._entries.items() if e.saved_at >= cutoff]
+        if len(entries) > self.max_entries:
+            entries.sort(key=lambda item: item[1].saved_at)
+            entries = entries[-self.max_entries:]
+        if len(entries) != len(self._entries):
+            self._entries = dict(entries)
+            self._dirty = True
+
+    def load(self) -> bool:
+        if self.path is None or not self.path.exists():
+            return False
+        try:
+            raw = json.loads(self.path.read_text(encoding="utf-8"))
+        except Exception:
+            return False
+        if not isinstance(raw, dict) or raw.get("version") != self.VERSION:
+            return False
+        entries: dict[str, RolloutOffset] = {}
+        for key, value in (raw.get("files") or {}).items():
+            try:
+                entries[str(key)] = RolloutOffset(
+                    int(value["dev"]),
+                    int(value["ino"]),
+                    int(value["offset"]),
+                    str(value.get("last_id") or ""),
+                    float(value.get("saved_at") or 0.0),
+                )
+            except (TypeError, ValueError, KeyError, AttributeError):
+                continue
+        self._entries = entries
+        self._dirty = False
+        self._prune()
+        return True
+
+    def save(self, force: bool = False):
+        if self.path is None:
+            return
+        self._prune()
+        if not (self._dirty or force):
+            return
+        data = {
+            "version": self.VERSION,
+            "files": {
+                key: {
+                    "dev": e.dev,
+                    "ino": e.ino,
+                    "offset": e.offset,
+                    "last_id": e.last_id,
+                    "saved_at": e.saved_at,
+                }
+                for key, e in self._entries.items()
+            },
+        }
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+            tmp_path.replace(self.path)
+            self._dirty = False
+        except Exception:
+            pass
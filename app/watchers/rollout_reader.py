@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import mmap
+import os
+from pathlib import Path
+from typing import Iterator, Optional
+
+
+def iter_lines_reversed(fpath: Path, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """
+    Lit un fichier depuis la fin par blocs de taille fixe et produit les lignes
+    (bytes, sans le "\\n") de la dernière à la première, lignes vides ignorées.
+
+    Le coût ne dépend que de la distance parcourue depuis EOF : on s'arrête dès que
+    l'appelant cesse d'itérer.
+    """
+    with fpath.open("rb") as f:
+        f.seek(0, 2)
+        pos = f.tell()
+        # Morceaux (en ordre inverse) de la ligne en cours de reconstitution
+        pending: list[bytes] = []
+        while pos > 0:
+            step = min(chunk_size, pos)
+            pos -= step
+            f.seek(pos)
+            chunk = f.read(step)
+
+            end = len(chunk)
+            nl = chunk.rfind(b"\n", 0, end)
+            while nl != -1:
+                pending.append(chunk[nl + 1:end])
+                line = b"".join(reversed(pending)) if len(pending) > 1 else pending[0]
+                pending.clear()
+                if line.strip():
+                    yield line
+                end = nl
+                nl = chunk.rfind(b"\n", 0, end)
+            pending.append(chunk[:end])
+
+        line = b"".join(reversed(pending))
+        if line.strip():
+            yield line
+
+
+def iter_lines_mmap(fpath: Path, marker: Optional[bytes] = None, reverse: bool = False) -> Iterator[bytes]:
+    """
+    Parcourt un rollout via mmap (vers l'avant ou depuis EOF) et produit les lignes non
+    vides, sans le "\\n".
+
+    Avec `marker`, on saute directement d'une occurrence à la suivante (find/rfind sur la
+    projection) et seules les lignes qui le contiennent sont copiées en bytes ; les autres
+    ne sont jamais lues côté Python. Lève OSError/ValueError si le fichier ne peut pas être
+    projeté (fichier vide, système de fichiers non supporté).
+    """
+    with fpath.open("rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        scan = _scan_mmap_reverse if reverse else _scan_mmap_forward
+        yield from scan(mm, len(mm), marker)
+    finally:
+        mm.close()
+
+
+def _scan_mmap_forward(mm: mmap.mmap, size: int, marker: Optional[bytes]) -> Iterator[bytes]:
+    pos = 0
+    while pos < size:
+        if marker is None:
+            start = pos
+            hit = pos
+        else:
+            hit = mm.find(marker, pos)
+            if hit == -1:
+                return
+            nl = mm.rfind(b"\n", pos, hit)
+            start = nl + 1 if nl != -1 else pos
+        end = mm.find(b"\n", hit)
+        if end == -1:
+            end = size
+        line = mm[start:end]
+        if line.strip():
+            yield line
+        pos = end + 1
+
+
+def _scan_mmap_reverse(mm: mmap.mmap, size: int, marker: Optional[bytes]) -> Iterator[bytes]:
+    end = size
+    while end > 0:
+        if marker is None:
+            line_end = end
+            nl = mm.rfind(b"\n", 0, end)
+        else:
+            hit = mm.rfind(marker, 0, end)
+            if hit == -1:
+                return
+            line_end = mm.find(b"\n", hit, end)
+            if line_end == -1:
+                line_end = end
+            nl = mm.rfind(b"\n", 0, hit)
+        line = mm[nl + 1:line_end]
+        if line.strip():
+            yield line
+        if nl == -1:
+            return
+        end = nl
+
+
+class RolloutTailer:
+    """
+    Lecture incrémentale binaire d'un rollout.
+
+    - Garde le fichier ouvert entre deux lectures et lit uniquement les nouveaux octets
+        (readinto dans un bytearray réutilisé).
+    - Une ligne incomplète en fin de fichier (en cours d'écriture par Codex) est
+        conservée jusqu'à la lecture suivante : `pos` ne dépasse jamais la fin de la
+        dernière ligne complète, aucune ligne n'est perdue.
+    - Chemin rapide : un seul stat() par appel ; si la taille et l'inode n'ont pas
+        changé, on retourne sans toucher au fichier. Un changement d'inode (replace du
+        scrubber, rotation) rouvre le fichier, une taille plus petite (troncature)
+        repositionne en fin.
+    """
+
+    def __init__(self, fpath: Path, pos: int = 0, buffer_size: int = 256 * 1024):
+        self.path = fpath
+        self.pos = pos
+        self._f = None
+        self._buf = bytearray(buffer_size)
+        self._view = memoryview(self._buf)
+        self._partial = bytearray()
+        self._ident: tuple[int, int] = (0, 0)
+        self.bytes_read = 0
+        # mtime du fichier au dernier read_lines() (0 tant qu'il n'a pas été lu)
+        self.mtime = 0.0
+
+    def close(self):
+        f, self._f = self._f, None
+        self._partial.clear()
+        if f is not None:
+            try:
+                f.close()
+            except Exception:
+                pass
+
+    def seek(self, pos: int):
+        self.pos = pos
+        self._partial.clear()
+
+    def _open(self):
+        self._f = self.path.open("rb", buffering=0)
+        st = os.fstat(self._f.fileno())
+        self._ident = (st.st_dev, st.st_ino)
+        self._partial.clear()
+
+    def read_lines(self) -> list[bytes]:
+        """Retourne les lignes complètes (non vides, sans fin de ligne) ajoutées depuis `pos`."""
+        st = os.stat(self.path)
+        self.mtime = st.st_mtime
+        if self._f is not None and (st.st_dev, st.st_ino) != self._ident:
+            # Fichier remplacé (scrubber, rotation) : on rouvre le nouveau.
+            self.close()
+        read_pos = self.pos + len(self._partial)
+        if st.st_size < read_pos:
+            # Troncature : les octets déjà lus n'existent plus, on reprend en fin.
+            self.seek(st.st_size)
+            return []
+        if self._f is not None and st.st_size == read_pos:
+            return []
+        if self._f is None:
+            self._open()
+            read_pos = self.pos
+
+        f = self._f
+        buf = self._buf
+        view = self._view
+        partial = self._partial
+        lines: list[bytes] = []
+
+        f.seek(read_pos)
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            base = read_pos
+            read_pos += n
+            self.bytes_read += n
+
+            start = 0
+            nl = buf.find(b"\n", 0, n)
+            while nl != -1:
+                if partial:
+                    partial += view[start:nl]
+                    line = bytes(partial).strip()
+                    partial.clear()
+                else:
+                    line = bytes(view[start:nl]).strip()
+                if line:
+                    lines.append(line)
+                start = nl + 1
+                nl = buf.find(b"\n", start, n)
+
+            if start:
+                self.pos = base + start
+            partial += view[start:n]
+            if n < len(buf):
+                break
+
+        return lines
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+
+@dataclass(slots=True)
+class RolloutRecord:
+    """Réponse assistant extraite d'une ligne de rollout."""
+
+    text: str
+    id: str = ""
+    session: Optional[Path] = None
+    timestamp: str = ""
+    # True pour un delta d'une réponse en cours d'écriture (mode streaming)
+    partial: bool = False
+
+
+RecordParser = Callable[[dict, Optional[Path]], Optional[RolloutRecord]]
+
+
+def content_text(content) -> str:
+    if isinstance(content, str):
+        return content.strip()
+
+    if isinstance(content, list):
+        # Chemin rapide : une seule partie {"type":"output_text","text":"..."}
+        if len(content) == 1:
+            item = content[0]
+            txt = item.get("text") if isinstance(item, dict) else None
+            return txt.strip() if isinstance(txt, str) else ""
+        parts = []
+        for item in content:
+            if isinstance(item, dict):
+                txt = item.get("text")
+                if isinstance(txt, str):
+                    parts.append(txt)
+        return "".join(parts).strip()
+
+    return ""
+
+
+class RecordParserRegistry:
+    """
+    Registre des formats de lignes de rollout, indexé par le champ "type" (ou "event").
+
+    Un dict donne le handler en O(1) ; les lignes sans type connu passent par le handler
+    par défaut. Le coût par ligne ne dépend donc pas du nombre de formats enregistrés.
+    """
+
+    def __init__(self, default: Optional[RecordParser] = None):
+        self._by_type: dict[str, RecordParser] = {}
+        self._default = default
+
+    def register(self, record_type: str, parser: Optional[RecordParser] = None):
+        """Enregistre un handler ; utilisable aussi comme décorateur."""
+        if parser is not None:
+            self._by_type[record_type] = parser
+            return parser
+
+        def decorator(fn: RecordParser) -> RecordParser:
+            self._by_type[record_type] = fn
+            return fn
+
+        return decorator
+
+    def set_default(self, parser: Optional[RecordParser]):
+        self._default = parser
+
+    def types(self) -> list[str]:
+        return list(self._by_type)
+
+    def parse(self, obj: dict, session: Optional[Path] = None) -> Optional[RolloutRecord]:
+        record_type = obj.get("type") or obj.get("event")
+        # Clé non hashable (liste, dict) : ligne hors format connu, handler par défaut.
+        handler = self._by_type.get(record_type, self._default) if isinstance(record_type, str) else self._default
+        if handler is None:
+            return None
+        return handler(obj, session)
+
+
+def _parse_response_item(obj: dict, session: Optional[Path]) -> Optional[RolloutRecord]:
+    # Format observé: {"type":"response_item","payload":{"role":"assistant","content":[{"type":"output_text","text":"..."}]}}
+    payload = obj.get("payload")
+    if not isinstance(payload, dict) or payload.get("role") != "assistant":
+        return None
+    text = content_text(payload.get("content"))
+    if not text:
+        return None
+    return RolloutRecord(text, str(payload.get("id") or obj.get("id") or ""), session, str(obj.get("timestamp") or ""))
+
+
+def _parse_untyped(obj: dict, session: Optional[Path]) -> Optional[RolloutRecord]:
+    # Fallbacks (formats possibles) : rôle au premier niveau ou message imbriqué
+    role = obj.get("role") or obj.get("author")
+    if role == "assistant":
+        content = obj.get("content")
+        if isinstance(content, str) and content.strip():
+            return RolloutRecord(content.strip(), str(obj.get("id") or ""), session, str(obj.get("timestamp") or ""))
+
+    msg = obj.get("message")
+    if isinstance(msg, dict):
+        r = msg.get("role") or msg.get("author")
+        if r == "assistant":
+            c = msg.get("content")
+            if isinstance(c, str) and c.strip():
+                mid = str(msg.get("id") or obj.get("id") or "")
+                return RolloutRecord(c.strip(), mid, session, str(obj.get("timestamp") or ""))
+
+    return None
+
+
+_DELTA_TYPES = frozenset({"agent_message_delta", "agent_message_content_delta", "response.output_text.delta"})
+
+
+def _parse_event_msg(obj: dict, session: Optional[Path]) -> Optional[RolloutRecord]:
+    # Deltas incrémentaux: {"type":"event_msg","payload":{"type":"agent_message_delta","delta":"..."}}
+    payload = obj.get("payload")
+    if not isinstance(payload, dict) or not isinstance(payload.get("type"), str) or payload["type"] not in _DELTA_TYPES:
+        return None
+    delta = payload.get("delta")
+    if not isinstance(delta, str) or not delta:
+        return None
+    return RolloutRecord(delta, str(payload.get("item_id") or ""), session, str(obj.get("timestamp") or ""), True)
+
+
+def _parse_output_delta(obj: dict, session: Optional[Path]) -> Optional[RolloutRecord]:
+    delta = obj.get("delta")
+    if not isinstance(delta, str) or not delta:
+        return None
+    return RolloutRecord(delta, str(obj.get("item_id") or ""), session, str(obj.get("timestamp") or ""), True)
+
+
+default_registry = RecordParserRegistry(default=_parse_untyped)
+default_registry.register("response_item", _parse_response_item)
+default_registry.register("event_msg", _parse_event_msg)
+default_registry.register("response.output_text.delta", _parse_output_delta)
@@ -0,0 +1,323 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, ContextManager, Iterable, Optional
+
+
+@dataclass
+class ScrubResult:
+    changed: bool
+    # Premier octet réécrit (tout ce qui précède est conservé tel quel)
+    start: int = 0
+    # Nombre de lignes réécrites
+    lines: int = 0
+
+
+class RolloutScrubber:
+    """
+    Suppression des champs TTS d'un rollout, en flux et de façon incrémentale.
+
+    - Mémorise par fichier l'offset déjà nettoyé : seules les nouvelles lignes sont lues.
+    - Chaque ligne modifiée est réécrite en place à sa longueur d'origine (complétée par
+        des espaces avant le saut de ligne, blancs JSON valides) : rien n'est décalé ni
+        tronqué, les ajouts concurrents de Codex et les positions de lecture sont préservés.
+    - Détection : une seule regex compilée (`"clé"\s*:` pour toutes les clés, insensible
+        à la casse) sur les octets bruts ; l'arbre JSON n'est parcouru que si elle matche.
+    """
+
+    def __init__(self, keys: Iterable[str]):
+        self.keys = {k.lower() for k in keys}
+        alternatives = b"|".join(
+            re.escape(k.encode("utf-8")) for k in sorted(self.keys, key=len, reverse=True)
+        )
+        self._matcher = re.compile(rb'"(?:' + alternatives + rb')"\s*:', re.IGNORECASE) if self.keys else None
+        # chemin -> (dev, inode, offset nettoyé)
+        self._clean: dict[str, tuple[int, int, int]] = {}
+
+    def may_contain_keys(self, raw: bytes) -> bool:
+        return self._matcher is not None and self._matcher.search(raw) is not None
+
+    def has_keys(self, value: Any) -> bool:
+        """Comme scrub_any mais sans modifier ni copier l'objet (détection seule)."""
+        if isinstance(value, dict):
+            keys = self.keys
+            for k, v in value.items():
+                if k.lower() in keys or ((isinstance(v, (dict, list))) and self.has_keys(v)):
+                    return True
+            return False
+        if isinstance(value, list):
+            for item in value:
+                if isinstance(item, (dict, list)) and self.has_keys(item):
+                    return True
+        return False
+
+    def scrub_any(self, value: Any) -> bool:
+        """Remove TTS keys recursively. Return True if changed."""
+        changed = False
+
+        if isinstance(value, dict):
+            keys_to_delete = [k for k in value.keys() if k.lower() in self.keys]
+            for k in keys_to_delete:
+                del value[k]
+                changed = True
+            for v in value.values():
+                if isinstance(v, (dict, list)) and self.scrub_any(v):
+                    changed = True
+            return changed
+
+        if isinstance(value, list):
+            for item in value:
+                if isinstance(item, (dict, list)) and self.scrub_any(item):
+                    changed = True
+            return changed
+
+        return False
+
+    def clean_offset(self, fpath: Path) -> int:
+        entry = self._clean.get(str(fpath))
+        return entry[2] if entry else 0
+
+    def forget(self, fpath: Path):
+        self._clean.pop(str(fpath), None)
+
+    def _scrub_line(self, line: bytes) -> Optional[bytes]:
+        """
+        Retourne la ligne réécrite (même longueur) si elle contenait des champs TTS, sinon
+        None. Une ligne que le réencodage allongerait (ex. 1e5 -> 100000.0) est laissée telle quelle.
+        """
+        body = line.rstrip(b"\r\n")
+        if not body.strip() or not self.may_contain_keys(body):
+            return None
+        try:
+            obj = json.loads(body)
+        except Exception:
+            return None
+        if not self.scrub_any(obj):
+            return None
+        scrubbed = json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        if len(scrubbed) > len(body):
+            return None
+        return scrubbed + b" " * (len(body) - len(scrubbed)) + line[len(body):]
+
+    def scrub(
+        self,
+        fpath: Path,
+        limit: Optional[int] = None,
+        lock: Optional[ContextManager] = None,
+        on_commit: Optional[Callable[[ScrubResult], None]] = None,
+    ) -> Optional[ScrubResult]:
+        """
+        Nettoie les lignes complètes entre l'offset déjà nettoyé et `limit` (par défaut
+        la fin du fichier). Rien au-delà de `limit` n'est lu ni touché.
+
+        La réécriture (et on_commit) se fait sous `lock`, ligne par ligne, après avoir
+        vérifié que chaque ligne est toujours celle qui a été lue. Retourne None sinon.
+        """
+        key = str(fpath)
+        try:
+            before = os.stat(fpath)
+        except OSError:
+            self.forget(fpath)
+            return None
+
+        ident = (before.st_dev, before.st_ino)
+        entry = self._clean.get(key)
+        start = entry[2] if entry and entry[:2] == ident and entry[2] <= before.st_size else 0
+        end_limit = before.st_size if limit is None else min(limit, before.st_size)
+
+        # (offset, ligne lue, ligne réécrite de même longueur)
+        patches: list[tuple[int, bytes, bytes]] = []
+        clean_end = start
+        try:
+            with fpath.open("rb") as src:
+                src.seek(start)
+                offset = start
+                for line in src:
+                    line_end = offset + len(line)
+                    if line_end > end_limit or not line.endswith(b"\n"):
+                        break
+                    replaced = self._scrub_line(line)
+                    if replaced is not None:
+                        patches.append((offset, line, replaced))
+                    offset = line_end
+                    clean_end = line_end
+
+            if not patches:
+                self._clean[key] = (*ident, clean_end)
+                return ScrubResult(False, clean_end)
+
+            result = ScrubResult(True, patches[0][0], len(patches))
+            with (lock if lock is not None else nullcontext()):
+                with fpath.open("r+b") as dst:
+                    # Même fichier, et lignes inchangées depuis la lecture (les ajouts en fin
+                    # de fichier sont sans effet : on n'écrit jamais au-delà de clean_end).
+                    st = os.fstat(dst.fileno())
+                    if (st.st_dev, st.st_ino) != ident or st.st_size < clean_end:
+                        return None
+                    for offset, line, _ in patches:
+                        dst.seek(offset)
+                        if dst.read(len(line)) != line:
+                            return None
+                    for offset, _, replaced in patches:
+                        dst.seek(offset)
+                        dst.write(replaced)
+                self._clean[key] = (*ident, clean_end)
+                if on_commit is not None:
+                    on_commit(result)
+            return result
+        except Exception:
+            return None
+
+
+@dataclass
+class _ScrubJob:
+    path: Path
+    # Fin de la plage à nettoyer (le début est l'offset déjà nettoyé par le scrubber)
+    end: int
+    not_before: float = 0.0
+    lock: Optional[ContextManager] = None
+    on_commit: Optional[Callable[[ScrubResult], None]] = None
+
+
+class ScrubWorker:
+    """
+    Thread de nettoyage basse priorité, hors du thread du watcher.
+
+    - File bornée de travaux (chemin, fin de plage) ; une demande pour un fichier déjà en
+        attente est fusionnée (on garde la plage la plus large).
+    - Un fichier n'est nettoyé qu'après `idle_seconds` sans écriture, et au plus une fois
+        toutes les `min_interval` secondes.
+    """
+
+    def __init__(
+        self,
+        scrubber: RolloutScrubber,
+        idle_seconds: float = 1.0,
+        min_interval: float = 2.0,
+        max_jobs: int = 64,
+        log: Callable[[str], None] = print,
+    ):
+        self.scrubber = scrubber
+        self.idle_seconds = idle_seconds
+        self.min_interval = min_interval
+        self.max_jobs = max_jobs
+        self.log = log
+
+        self._cond = threading.Condition()
+        self._pending: dict[Path, _ScrubJob] = {}
+        self._last_run: dict[Path, float] = {}
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+        self.dropped = 0
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="RolloutScrubWorker", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._pending.clear()
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=2)
+
+    def submit(
+        self,
+        path: Path,
+        end: int,
+        lock: Optional[ContextManager] = None,
+        on_commit: Optional[Callable[[ScrubResult], None]] = None,
+    ) -> bool:
+        with self._cond:
+            if self._stopped:
+                return False
+            job = self._pending.get(path)
+            if job is not None:
+                job.end = max(job.end, end)
+                job.lock = lock
+                job.on_commit = on_commit
+                return True
+            if len(self._pending) >= self.max_jobs:
+                self.dropped += 1
+                return False
+            self._pending[path] = _ScrubJob(path, end, lock=lock, on_commit=on_commit)
+            self._cond.notify()
+            return True
+
+    def _requeue(self, job: _ScrubJob, not_before: float):
+        with self._cond:
+            if self._stopped:
+                return
+            current = self._pending.get(job.path)
+            if current is not None:
+                current.end = max(current.end, job.end)
+                current.not_before = max(current.not_before, not_before)
+                return
+            job.not_before = not_before
+            self._pending[job.path] = job
+
+    def _next_job(self) -> Optional[_ScrubJob]:
+        with self._cond:
+            while not self._stopped:
+                now = time.time()
+                wait: Optional[float] = None
+                for path, job in self._pending.items():
+                    if job.not_before <= now:
+                        return self._pending.pop(path)
+                    delay = job.not_before - now
+                    wait = delay if wait is None else min(wait, delay)
+                self._cond.wait(wait)
+            return None
+
+    @staticmethod
+    def _lower_priority():
+        """Best-effort : baisse la priorité du thread courant (Windows / Linux)."""
+        try:
+            if sys.platform == "win32":
+                import ctypes
+
+                kernel32 = ctypes.windll.kernel32
+                kernel32.SetThreadPriority(kernel32.GetCurrentThread(), -1)  # BELOW_NORMAL
+            elif hasattr(os, "setpriority"):
+                os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+        except Exception:
+            pass
+
+    def _run(self):
+        self._lower_priority()
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+
+            now = time.time()
+            try:
+                mtime = os.stat(job.path).st_mtime
+            except OSError:
+                self.scrubber.forget(job.path)
+                continue
+            ready_at = max(mtime + self.idle_seconds, self._last_run.get(job.path, 0.0) + self.min_interval)
+            if now < ready_at:
+                self._requeue(job, ready_at)
+                continue
+
+            try:
+                result = self.scrubber.scrub(job.path, limit=job.end, lock=job.lock, on_commit=job.on_commit)
+            except Exception as e:
+                self.log(f"[sessions] Nettoyage impossible ({job.path}): {e}")
+                result = ScrubResult(False)
+            self._last_run[job.path] = time.time()
+            if result is None:
+                # Fichier modifié pendant la lecture : on retentera au prochain repos.
+                self._requeue(job, time.time() + self.idle_seconds)
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import re
+
+# Fin de phrase : ponctuation suivie d'un blanc, ou saut de ligne
+_SENTENCE_END = re.compile(r"(?<=[.!?…:;])\s+|\n+")
+
+
+class SentenceStream:
+    """
+    Assemble les deltas d'une réponse en cours d'écriture et ne livre que des morceaux
+    terminés par une fin de phrase ; le reste attend le delta suivant ou finish().
+    """
+
+    def __init__(self, min_chars: int = 1):
+        self.min_chars = min_chars
+        self._buf = ""
+        self._emitted: list[str] = []
+
+    @property
+    def started(self) -> bool:
+        return bool(self._emitted or self._buf)
+
+    def feed(self, delta: str) -> list[str]:
+        self._buf += delta
+        cut = 0
+        for m in _SENTENCE_END.finditer(self._buf):
+            if m.start() - cut >= self.min_chars:
+                cut = m.end()
+        if not cut:
+            return []
+        ready, self._buf = self._buf[:cut], self._buf[cut:]
+        fragments = [p.strip() for p in _SENTENCE_END.split(ready) if p and p.strip()]
+        if fragments:
+            self._emitted.append(ready)
+        return [" ".join(fragments)] if fragments else []
+
+    def finish(self, full_text: str = "") -> str:
+        """Retourne la fin non encore livrée (d'après le texte final si fourni) et réinitialise."""
+        emitted = "".join(self._emitted).strip()
+        if full_text and emitted and full_text.startswith(emitted):
+            tail = full_text[len(emitted):]
+        elif full_text and not emitted:
+            tail = full_text
+        else:
+            tail = self._buf
+        self._buf = ""
+        self._emitted = []
+        return tail.strip()
@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Callable, Optional
+
+
+class PollingDiscovery:
+    """
+    Découverte par polling : aucune notification disponible, chaque appel à poll()
+    demande un rescan complet (comportement historique du watcher).
+    """
+
+    name = "polling"
+    notifies = False
+
+    def __init__(self, root: Path, pattern: str):
+        self.root = root
+        self.pattern = pattern
+
+    def poll(self) -> Optional[set[Path]]:
+        """Retourne les fichiers modifiés, ou None si un rescan complet est nécessaire."""
+        return None
+
+    def fileno(self) -> Optional[int]:
+        """Descripteur lisible à chaque notification (None : pas de notifications)."""
+        return None
+
+    def wake(self):
+        pass
+
+    def close(self):
+        pass
+
+
+# Constantes inotify (linux/inotify.h)
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = (
+    _IN_MODIFY
+    | _IN_CLOSE_WRITE
+    | _IN_MOVED_FROM
+    | _IN_MOVED_TO
+    | _IN_CREATE
+    | _IN_DELETE
+    | _IN_DELETE_SELF
+)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyDiscovery:
+    """
+    Découverte événementielle via inotify (Linux).
+
+    Chaque dossier de ~/.codex/sessions est surveillé ; poll() lit les événements
+    en attente (sans bloquer) et retourne les rollouts créés/modifiés depuis l'appel
+    précédent. Un rescan complet n'est demandé qu'en cas de débordement de la file
+    du noyau (IN_Q_OVERFLOW) ; l'état initial vient de l'index des rollouts.
+    """
+
+    name = "inotify"
+    notifies = True
+
+    def __init__(self, root: Path, pattern: str):
+        self.root = root
+        self.pattern = pattern
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._libc.inotify_add_watch.restype = ctypes.c_int
+        fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._fd: Optional[int] = fd
+        # Pipe de réveil pour interrompre wait() (arrêt du watcher)
+        self._wake_r, self._wake_w = os.pipe()
+        self._wd_to_dir: dict[int, Path] = {}
+        self._rescan_pending = False
+        try:
+            self._watch_tree(root)
+        except Exception:
+            self.close()
+            raise
+
+    def _add_watch(self, directory: Path):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(str(directory)), _WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), str(directory))
+        self._wd_to_dir[wd] = directory
+
+    def _watch_tree(self, top: Path):
+        self._add_watch(top)
+        for dirpath, dirnames, _ in os.walk(top):
+            for d in dirnames:
+                self._add_watch(Path(dirpath) / d)
+
+    def _rollouts_under(self, top: Path) -> set[Path]:
+        found: set[Path] = set()
+        for dirpath, _, filenames in os.walk(top):
+            for name in filenames:
+                if fnmatch(name, self.pattern):
+                    found.add(Path(dirpath) / name)
+        return found
+
+    def poll(self) -> Optional[set[Path]]:
+        if self._fd is None:
+            return None
+
+        changed: set[Path] = set()
+        while True:
+            try:
+                buf = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not buf:
+                break
+
+            offset = 0
+            while offset + _EVENT_HEADER.size <= len(buf):
+                wd, mask, _cookie, name_len = _EVENT_HEADER.unpack_from(buf, offset)
+                offset += _EVENT_HEADER.size
+                raw_name = buf[offset:offset + name_len].rstrip(b"\0")
+                offset += name_len
+
+                if mask & _IN_Q_OVERFLOW:
+                    self._rescan_pending = True
+                    continue
+                if mask & _IN_IGNORED:
+                    self._wd_to_dir.pop(wd, None)
+                    continue
+
+                directory = self._wd_to_dir.get(wd)
+                if directory is None or not raw_name:
+                    continue
+                path = directory / os.fsdecode(raw_name)
+
+                if mask & _IN_ISDIR:
+                    if mask & (_IN_CREATE | _IN_MOVED_TO):
+                        # Nouveau dossier (ex: nouveau jour) : on le surveille et on
+                        # récupère les fichiers créés avant que la surveillance soit active.
+                        try:
+                            self._watch_tree(path)
+                        except OSError:
+                            self._rescan_pending = True
+                        changed |= self._rollouts_under(path)
+                    continue
+
+                if fnmatch(path.name, self.pattern):
+                    changed.add(path)
+
+        if self._rescan_pending:
+            self._rescan_pending = False
+            return None
+        return changed
+
+    def fileno(self) -> Optional[int]:
+        return self._fd
+
+    def wait(self, timeout: float) -> bool:
+        """Bloque jusqu'à un événement, un wake() ou `timeout`. Retourne True si réveillé."""
+        fd = self._fd
+        if fd is None:
+            return False
+        try:
+            ready, _, _ = select.select([fd, self._wake_r], [], [], timeout)
+        except (OSError, ValueError):
+            return False
+        if self._wake_r in ready:
+            try:
+                os.read(self._wake_r, 64)
+            except OSError:
+                pass
+        return bool(ready)
+
+    def wake(self):
+        try:
+            os.write(self._wake_w, b"\0")
+        except OSError:
+            pass
+
+    def close(self):
+        fd, self._fd = self._fd, None
+        for f in (fd, self._wake_r, self._wake_w):
+            if f is None:
+                continue
+            try:
+                os.close(f)
+            except OSError:
+                pass
+
+
+def create_discovery(root: Path, pattern: str, log: Callable[[str], None] = print):
+    """Choisit le meilleur moteur disponible (inotify sous Linux, sinon polling)."""
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyDiscovery(root, pattern)
+        except Exception as e:
+            log(f"[sessions] inotify indisponible ({e}), fallback polling")
+    return PollingDiscovery(root, pattern)
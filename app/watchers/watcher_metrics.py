@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import json
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Optional, Sequence
+
+
+class LatencyHistogram:
+    """Histogramme à seaux fixes (bornes supérieures croissantes), percentiles approchés."""
+
+    def __init__(self, bounds: Sequence[float], unit: str):
+        self.bounds = tuple(bounds)
+        self.unit = unit
+        # Un seau de plus pour les valeurs au-delà de la dernière borne
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, p: float) -> float:
+        """Borne supérieure du seau contenant le p-ième percentile (max si au-delà)."""
+        if not self.count:
+            return 0.0
+        rank = p / 100.0 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+        return self.max
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "unit": self.unit,
+            "count": self.count,
+            "mean": (self.total / self.count) if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max,
+            "buckets": {
+                (f"<={b:g}" if i < len(self.bounds) else f">{self.bounds[-1]:g}"): n
+                for i, (b, n) in enumerate(zip((*self.bounds, self.bounds[-1]), self.counts))
+                if n
+            },
+        }
+
+
+class WatcherMetrics:
+    """
+    Compteurs et latences du watcher de sessions (mis à jour sans verrou par le thread
+    du watcher ; snapshot() donne une vue cohérente à quelques unités près).
+
+    - mtime_to_emit : écriture du rollout (mtime) -> livraison du message, en ms.
+    - decode : json.loads d'une ligne, en µs.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.bytes_read = 0
+        self.lines_decoded = 0
+        self.lines_skipped = 0
+        self.messages_emitted = 0
+        self.fragments_emitted = 0
+        self.scrubs = 0
+        self.rescans = 0
+        self.refreshes = 0
+        self.mtime_to_emit = LatencyHistogram(
+            (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000), "ms"
+        )
+        self.decode = LatencyHistogram((5, 10, 25, 50, 100, 250, 500, 1000, 5000), "us")
+
+    def snapshot(self) -> dict[str, Any]:
+        now = time.time()
+        uptime = max(1e-9, now - self.started_at)
+        lines = self.lines_decoded + self.lines_skipped
+        return {
+            "time": now,
+            "uptime": uptime,
+            "bytes_read": self.bytes_read,
+            "lines_decoded": self.lines_decoded,
+            "lines_skipped": self.lines_skipped,
+            "lines_per_sec": lines / uptime,
+            "messages_emitted": self.messages_emitted,
+            "fragments_emitted": self.fragments_emitted,
+            "scrubs": self.scrubs,
+            "rescans": self.rescans,
+            "refreshes": self.refreshes,
+            "mtime_to_emit": self.mtime_to_emit.snapshot(),
+            "decode": self.decode.snapshot(),
+        }
+
+    def dump(self, path: Path, extra: Optional[dict[str, Any]] = None):
+        """Écrit le snapshot en JSON (écriture atomique, best-effort)."""
+        data = self.snapshot()
+        if extra:
+            data.update(extra)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+            tmp_path.replace(path)
+        except Exception:
+            pass
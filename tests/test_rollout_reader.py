@@ -0,0 +1,111 @@
+import os
+import random
+
+from app.watchers.rollout_reader import RolloutTailer
+
+
+def _append(path, data: bytes):
+    with path.open("ab") as f:
+        f.write(data)
+
+
+def test_partial_line_is_kept_until_complete(tmp_path):
+    path = tmp_path / "rollout.jsonl"
+    path.write_bytes(b'{"a":1}\n{"b":')
+    tailer = RolloutTailer(path)
+
+    assert tailer.read_lines() == [b'{"a":1}']
+    assert tailer.pos == len(b'{"a":1}\n')
+    assert tailer.read_lines() == []
+
+    _append(path, b"2}\n")
+    assert tailer.read_lines() == [b'{"b":2}']
+    assert tailer.pos == path.stat().st_size
+    tailer.close()
+
+
+def test_blank_lines_and_crlf_are_stripped(tmp_path):
+    path = tmp_path / "rollout.jsonl"
+    path.write_bytes(b"one\r\n\n  \ntwo\n")
+    tailer = RolloutTailer(path)
+
+    assert tailer.read_lines() == [b"one", b"two"]
+    tailer.close()
+
+
+def test_starts_from_given_position(tmp_path):
+    path = tmp_path / "rollout.jsonl"
+    path.write_bytes(b"old\nnew\n")
+    tailer = RolloutTailer(path, pos=4)
+
+    assert tailer.read_lines() == [b"new"]
+    tailer.close()
+
+
+def test_truncation_repositions_at_end(tmp_path):
+    path = tmp_path / "rollout.jsonl"
+    path.write_bytes(b"first\nsecond\n")
+    tailer = RolloutTailer(path)
+    assert tailer.read_lines() == [b"first", b"second"]
+
+    with path.open("r+b") as f:
+        f.truncate(3)
+    assert tailer.read_lines() == []
+    assert tailer.pos == 3
+
+    _append(path, b"\nthird\n")
+    assert tailer.read_lines() == [b"third"]
+    tailer.close()
+
+
+def test_truncation_drops_pending_partial(tmp_path):
+    path = tmp_path / "rollout.jsonl"
+    path.write_bytes(b"done\npart")
+    tailer = RolloutTailer(path)
+    assert tailer.read_lines() == [b"done"]
+
+    with path.open("r+b") as f:
+        f.truncate(5)
+    assert tailer.read_lines() == []
+    _append(path, b"next\n")
+    assert tailer.read_lines() == [b"next"]
+    tailer.close()
+
+
+def test_replaced_inode_is_reopened(tmp_path):
+    path = tmp_path / "rollout.jsonl"
+    path.write_bytes(b"one\n")
+    tailer = RolloutTailer(path)
+    assert tailer.read_lines() == [b"one"]
+
+    replacement = tmp_path / "replacement.jsonl"
+    replacement.write_bytes(b"one\ntwo\n")
+    os.replace(replacement, path)
+
+    assert tailer.read_lines() == [b"two"]
+    _append(path, b"three\n")
+    assert tailer.read_lines() == [b"three"]
+    tailer.close()
+
+
+def test_random_chunked_writes_match_whole_file(tmp_path):
+    rng = random.Random(1234)
+    path = tmp_path / "rollout.jsonl"
+    path.write_bytes(b"")
+    # Petit tampon : lignes et fins de ligne à cheval sur plusieurs lectures
+    tailer = RolloutTailer(path, buffer_size=7)
+
+    expected = [f'{{"n":{i},"t":"{"x" * rng.randint(0, 40)}"}}'.encode() for i in range(200)]
+    data = b"".join(line + b"\n" for line in expected)
+    got = []
+    offset = 0
+    while offset < len(data):
+        step = rng.randint(1, 60)
+        _append(path, data[offset:offset + step])
+        offset += step
+        got.extend(tailer.read_lines())
+        assert tailer.pos <= offset
+
+    assert got == expected
+    assert tailer.pos == len(data)
+    tailer.close()
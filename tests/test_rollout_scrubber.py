@@ -0,0 +1,183 @@
+import json
+import os
+from contextlib import contextmanager
+
+from app.watchers.rollout_reader import RolloutTailer
+from app.watchers.rollout_scrubber import RolloutScrubber
+
+KEYS = ("tts", "audio", "voice")
+
+
+def _line(text, **extra) -> bytes:
+    obj = {"type": "response_item", "payload": {"role": "assistant", "content": text, **extra}}
+    return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _write(path, *lines: bytes):
+    path.write_bytes(b"".join(lines))
+
+
+@contextmanager
+def _during_commit(action):
+    """Faux verrou d'E/S : `action` s'exécute entre la lecture et la réécriture."""
+    action()
+    yield
+
+
+def test_scrub_rewrites_in_place_at_constant_length(tmp_path):
+    path = tmp_path / "rollout.jsonl"
+    original = [_line("a", tts={"audio": "x" * 40}), _line("b"), _line("é", voice="Paul")]
+    _write(path, *original)
+
+    result = RolloutScrubber(KEYS).scrub(path)
+
+    assert result is not None and result.changed
+    assert result.start == 0 and result.lines == 2
+    data = path.read_bytes()
+    assert len(data) == sum(len(line) for line in original)
+    lines = data.splitlines(keepends=True)
+    assert [len(line) for line in lines] == [len(line) for line in original]
+    assert lines[1] == original[1]
+    for raw in lines:
+        obj = json.loads(raw)
+        assert "tts" not in obj["payload"] and "voice" not in obj["payload"]
+    assert lines[0].endswith(b" \n")
+
+
+def test_scrub_keeps_crlf_and_unchanged_file(tmp_path):
+    path = tmp_path / "rollout.jsonl"
+    _write(path, _line("a", tts=1).replace(b"\n", b"\r\n"))
+
+    result = RolloutScrubber(KEYS).scrub(path)
+
+    assert result.changed
+    assert path.read_bytes().endswith(b" \r\n")
+    assert RolloutScrubber(KEYS).scrub(path).changed is False
+
+
+def test_scrub_ignores_partial_last_line_and_bytes_past_limit(tmp_path):
+    path = tmp_path / "rollout.jsonl"
+    first, second = _line("a", tts=1), _line("b", tts=2)
+    partial = _line("c", tts=3)[:-5]
+    _write(path, first, second, partial)
+
+    result = RolloutScrubber(KEYS).scrub(path, limit=len(first) + 3)
+
+    assert result.lines == 1
+    data = path.read_bytes()
+    assert data[len(first):] == second + partial
+
+    scrubber = RolloutScrubber(KEYS)
+    scrubber.scrub(path)
+    assert path.read_bytes().endswith(partial)
+    assert scrubber.clean_offset(path) == len(first) + len(second)
+
+
+def test_scrub_skips_lines_that_would_grow(tmp_path):
+    path = tmp_path / "rollout.jsonl"
+    # 1E1 -> 10.0 : le réencodage allonge la ligne plus que la clé retirée ne la raccourcit
+    grows = b'{"values":[' + b",".join([b"1E1"] * 20) + b'],"tts":0}\n'
+    shrinks = _line("a", tts="x" * 20)
+    _write(path, grows, shrinks)
+
+    result = RolloutScrubber(KEYS).scrub(path)
+
+    assert result.lines == 1
+    data = path.read_bytes()
+    assert data.startswith(grows)
+    assert len(data) == len(grows) + len(shrinks)
+    assert "tts" not in json.loads(data[len(grows):])["payload"]
+
+
+def test_scrub_preserves_concurrent_appends(tmp_path):
+    path = tmp_path / "rollout.jsonl"
+    original = [_line(f"m{i}", tts={"audio": "x" * 30}) for i in range(50)]
+    _write(path, *original)
+    appended = [_line(f"new{i}", tts=i) for i in range(10)]
+
+    def append():
+        with path.open("ab") as f:
+            f.writelines(appended)
+
+    result = RolloutScrubber(KEYS).scrub(path, lock=_during_commit(append))
+
+    assert result is not None and result.lines == len(original)
+    lines = path.read_bytes().splitlines(keepends=True)
+    assert lines[len(original):] == appended
+    assert all("tts" not in json.loads(raw)["payload"] for raw in lines[:len(original)])
+
+
+def test_scrub_rejects_line_changed_since_read(tmp_path):
+    path = tmp_path / "rollout.jsonl"
+    first = _line("a", tts=1)
+    _write(path, first)
+    altered = first.replace(b'"a"', b'"z"')
+
+    def rewrite():
+        with path.open("r+b") as f:
+            f.write(altered)
+
+    assert RolloutScrubber(KEYS).scrub(path, lock=_during_commit(rewrite)) is None
+    assert path.read_bytes() == altered
+
+
+def test_scrub_rejects_replaced_inode(tmp_path):
+    path = tmp_path / "rollout.jsonl"
+    first = _line("a", tts=1)
+    _write(path, first)
+    replacement = tmp_path / "replacement.jsonl"
+    _write(replacement, first)
+
+    def replace():
+        os.replace(replacement, path)
+
+    commits = []
+    result = RolloutScrubber(KEYS).scrub(path, lock=_during_commit(replace), on_commit=commits.append)
+
+    assert result is None and not commits
+    assert path.read_bytes() == first
+
+
+def test_scrub_rejects_truncated_file(tmp_path):
+    path = tmp_path / "rollout.jsonl"
+    first, second = _line("a", tts=1), _line("b", tts=2)
+    _write(path, first, second)
+
+    def truncate():
+        with path.open("r+b") as f:
+            f.truncate(len(first))
+
+    assert RolloutScrubber(KEYS).scrub(path, lock=_during_commit(truncate)) is None
+    assert path.read_bytes() == first
+
+
+def test_scrub_is_incremental(tmp_path):
+    path = tmp_path / "rollout.jsonl"
+    first = _line("a", tts=1)
+    _write(path, first)
+    scrubber = RolloutScrubber(KEYS)
+    scrubber.scrub(path)
+    scrubbed = path.read_bytes()
+
+    second = _line("b", tts=2)
+    with path.open("ab") as f:
+        f.write(second)
+    result = scrubber.scrub(path)
+
+    assert result.start == len(first) and result.lines == 1
+    assert path.read_bytes()[:len(first)] == scrubbed
+
+
+def test_tailer_position_survives_scrub(tmp_path):
+    path = tmp_path / "rollout.jsonl"
+    _write(path, _line("a", tts=1), _line("b", tts=2))
+    tailer = RolloutTailer(path)
+    assert len(tailer.read_lines()) == 2
+
+    RolloutScrubber(KEYS).scrub(path, limit=tailer.pos)
+    with path.open("ab") as f:
+        f.write(_line("c"))
+
+    lines = tailer.read_lines()
+    assert [json.loads(raw)["payload"]["content"] for raw in lines] == ["c"]
+    tailer.close()